@@ -1,15 +1,144 @@
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
 from zipfile import ZipFile
 import io
 import base64
 import math
+import logging
+from array import array
+from ooxml_utils import EMU_PER_POINT, first
+
+logger = logging.getLogger(__name__)
+
+_NS = {
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    'p': 'http://schemas.openxmlformats.org/presentationml/2006/main'
+}
+
+# Compiled XPath queries, shared by all handler instances. OOXML nesting is
+# fixed by the schema, so these use direct child steps instead of './/'.
+_XP_SPPR = ET.XPath('./p:spPr', namespaces=_NS)
+_XP_GRADFILL = ET.XPath('./a:gradFill', namespaces=_NS)
+_XP_CUSTGEOM = ET.XPath('./a:custGeom', namespaces=_NS)
+_XP_EFFECTLST = ET.XPath('./a:effectLst', namespaces=_NS)
+_XP_LIN = ET.XPath('./a:lin', namespaces=_NS)
+_XP_PATH = ET.XPath('./a:path', namespaces=_NS)
+_XP_GS = ET.XPath('./a:gsLst/a:gs', namespaces=_NS)
+_XP_SRGB = ET.XPath('./a:srgbClr', namespaces=_NS)
+_XP_PATHLST = ET.XPath('./a:pathLst', namespaces=_NS)
+_XP_OUTERSHDW = ET.XPath('./a:outerShdw', namespaces=_NS)
+_XP_GLOW = ET.XPath('./a:glow', namespaces=_NS)
+_XP_SOFTEDGE = ET.XPath('./a:softEdge', namespaces=_NS)
+
+# Clark-notation tags of the custom geometry path commands
+_A_NS = _NS['a']
+_PT = '{%s}pt' % _A_NS
+_MOVE_TO = '{%s}moveTo' % _A_NS
+_LN_TO = '{%s}lnTo' % _A_NS
+_CUBIC_BEZ_TO = '{%s}cubicBezTo' % _A_NS
+_ARC_TO = '{%s}arcTo' % _A_NS
+_CLOSE = '{%s}close' % _A_NS
+
+def _raw_points(cmd):
+    """Get the raw x/y attribute strings of a path command's points"""
+    raw = []
+    for pt in cmd:
+        if pt.tag == _PT:
+            raw.append(pt.get('x', '0'))
+            raw.append(pt.get('y', '0'))
+    return raw
+
+# Path command handlers. Each appends an (op, point_count) entry to ops and
+# the command's unconverted coordinates to raw; the coordinates of a whole
+# path are converted in one batch afterwards. Arcs carry their parameters
+# in place of the point count.
+def _handle_move(cmd, ops, raw):
+    x, y = _raw_points(cmd)[:2]
+    ops.append(('M', 1))
+    raw += (x, y)
+
+def _handle_ln(cmd, ops, raw):
+    x, y = _raw_points(cmd)[:2]
+    ops.append(('L', 1))
+    raw += (x, y)
+
+def _handle_cubic_bez(cmd, ops, raw):
+    pts = _raw_points(cmd)
+    if len(pts) == 6:
+        ops.append(('C', 3))
+        raw += pts
+
+def _handle_arc(cmd, ops, raw):
+    # The arc starts at the current point, which is only known once the
+    # coordinates are converted, so keep its parameters for the second pass
+    wR = int(cmd.get('wR', '0')) / 100000
+    hR = int(cmd.get('hR', '0')) / 100000
+    stAng = int(cmd.get('stAng', '0')) / 60000
+    swAng = int(cmd.get('swAng', '0')) / 60000
+    ops.append(('A', (wR, hR, stAng, swAng)))
+
+def _handle_close(cmd, ops, raw):
+    ops.append(('Z', 0))
+
+# Path command tag -> handler. Keyed on the full Clark tag, so dispatch is a
+# single hash lookup with no namespace splitting or string comparisons.
+_PATH_COMMANDS = {
+    _MOVE_TO: _handle_move,
+    _LN_TO: _handle_ln,
+    _CUBIC_BEZ_TO: _handle_cubic_bez,
+    _ARC_TO: _handle_arc,
+    _CLOSE: _handle_close
+}
+
+def _arc_to_cubic(x, y, wR, hR, stAng, swAng):
+    """Split an elliptical arc starting at (x, y) into cubic bezier curves
+    
+    Angles are in degrees. Returns one (x1, y1, x2, y2, x3, y3) tuple per
+    sub-arc of at most 90 degrees.
+    """
+    if not swAng:
+        return []
+    
+    start = math.radians(stAng)
+    count = math.ceil(abs(swAng) / 90)
+    step = math.radians(swAng) / count
+    k = 4 / 3 * math.tan(step / 4)
+    
+    # Centre of the ellipse the arc lies on
+    cx = x - wR * math.cos(start)
+    cy = y - hR * math.sin(start)
+    
+    segments = []
+    cos0, sin0 = math.cos(start), math.sin(start)
+    for i in range(1, count + 1):
+        angle = start + step * i
+        cos1, sin1 = math.cos(angle), math.sin(angle)
+        x0, y0 = cx + wR * cos0, cy + hR * sin0
+        x3, y3 = cx + wR * cos1, cy + hR * sin1
+        segments.append((
+            x0 - k * wR * sin0, y0 + k * hR * cos0,
+            x3 + k * wR * sin1, y3 - k * hR * cos1,
+            x3, y3
+        ))
+        cos0, sin0 = cos1, sin1
+    return segments
+
+# cos/sin of every whole-degree angle; gradient angles are almost always
+# whole degrees, so most shapes skip the trig calls entirely
+_ANGLE_LUT = [
+    (math.cos(deg * math.pi / 180), math.sin(deg * math.pi / 180))
+    for deg in range(360)
+]
+
+def _angle_cos_sin(angle):
+    """Get (cos, sin) of an angle in degrees"""
+    if angle == int(angle):
+        return _ANGLE_LUT[int(angle) % 360]
+    rad = angle * math.pi / 180
+    return math.cos(rad), math.sin(rad)
 
 class AdvancedShapeHandler:
     def __init__(self):
-        self.namespace = {
-            'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-            'p': 'http://schemas.openxmlformats.org/presentationml/2006/main'
-        }
+        self.namespace = _NS
     
     def extract_shape_properties(self, shape):
         """Extract advanced shape properties directly from OOXML"""
@@ -28,29 +157,29 @@ class AdvancedShapeHandler:
             }
             
             # Get shape properties element
-            sp_pr = shape.element.find('.//a:spPr', self.namespace)
+            sp_pr = first(_XP_SPPR(shape.element))
             if sp_pr is None:
                 return None
                 
             # Extract gradient fill
-            grad_fill = sp_pr.find('.//a:gradFill', self.namespace)
+            grad_fill = first(_XP_GRADFILL(sp_pr))
             if grad_fill is not None:
                 props['gradient'] = self._extract_gradient(grad_fill)
             
             # Extract custom geometry
-            custom_geom = sp_pr.find('.//a:custGeom', self.namespace)
+            custom_geom = first(_XP_CUSTGEOM(sp_pr))
             if custom_geom is not None:
                 props['custom_geometry'] = self._extract_custom_geometry(custom_geom)
             
             # Extract effects
-            effects = sp_pr.find('.//a:effectLst', self.namespace)
+            effects = first(_XP_EFFECTLST(sp_pr))
             if effects is not None:
                 props['effects'] = self._extract_effects(effects)
             
             return props
             
         except Exception as e:
-            print(f"Error extracting advanced properties: {e}")
+            logger.error("Error extracting advanced properties: %s", e)
             return None
     
     def _extract_gradient(self, grad_fill):
@@ -59,105 +188,96 @@ class AdvancedShapeHandler:
             gradient = {
                 'type': 'linear',  # default
                 'angle': 0,
-                'stops': []
+                'stops': ((), ())  # (offsets, colors)
             }
             
             # Get gradient type
-            if grad_fill.find('.//a:lin', self.namespace) is not None:
-                lin = grad_fill.find('.//a:lin', self.namespace)
+            lin = first(_XP_LIN(grad_fill))
+            if lin is not None:
                 angle = int(lin.get('ang', '0')) / 60000  # Convert to degrees
                 gradient['angle'] = angle
-            elif grad_fill.find('.//a:path', self.namespace) is not None:
+            elif first(_XP_PATH(grad_fill)) is not None:
                 gradient['type'] = 'radial'
             
-            # Get gradient stops
-            gs_list = grad_fill.findall('.//a:gs', self.namespace)
-            for gs in gs_list:
+            # Get gradient stops, sorted by offset and stored as parallel
+            # (offsets, colors) tuples
+            stops = []
+            for gs in _XP_GS(grad_fill):
                 pos = int(gs.get('pos', '0')) / 100000  # Normalize to 0-1
                 
                 # Get color
-                color = None
-                srgb_clr = gs.find('.//a:srgbClr', self.namespace)
+                srgb_clr = first(_XP_SRGB(gs))
                 if srgb_clr is not None:
-                    color = f"#{srgb_clr.get('val')}"
-                
-                if color:
-                    gradient['stops'].append({
-                        'offset': pos,
-                        'color': color
-                    })
+                    stops.append((pos, f"#{srgb_clr.get('val')}"))
+            
+            stops.sort(key=lambda stop: stop[0])
+            if stops:
+                gradient['stops'] = tuple(zip(*stops))
             
             return gradient
             
         except Exception as e:
-            print(f"Error extracting gradient: {e}")
+            logger.error("Error extracting gradient: %s", e)
             return None
     
     def _extract_custom_geometry(self, custom_geom):
         """Extract custom shape geometry"""
         try:
             geometry = {
-                'paths': [],
-                'rect': None
+                'paths': []
             }
             
-            # Get shape boundaries
-            rect = custom_geom.find('.//a:rect', self.namespace)
-            if rect is not None:
-                geometry['rect'] = {
-                    'l': int(rect.get('l', '0')) / 100000,
-                    't': int(rect.get('t', '0')) / 100000,
-                    'r': int(rect.get('r', '0')) / 100000,
-                    'b': int(rect.get('b', '0')) / 100000
-                }
+            path_list = first(_XP_PATHLST(custom_geom))
+            paths = _XP_PATH(path_list) if path_list is not None else []
             
             # Get path list
-            path_list = custom_geom.find('.//a:pathLst', self.namespace)
-            if path_list is not None:
-                for path in path_list.findall('.//a:path', self.namespace):
-                    path_data = []
+            if paths:
+                get_handler = _PATH_COMMANDS.get
+                for path in paths:
+                    ops = []
+                    raw = []
                     
-                    # Process each command
+                    # Collect each command and its raw coordinates
                     for cmd in path:
-                        tag = cmd.tag.split('}')[-1]
-                        if tag == 'moveTo':
-                            pt = cmd.find('.//a:pt', self.namespace)
-                            x = int(pt.get('x', '0')) / 100000
-                            y = int(pt.get('y', '0')) / 100000
-                            path_data.append(f'M {x} {y}')
-                        elif tag == 'lnTo':
-                            pt = cmd.find('.//a:pt', self.namespace)
-                            x = int(pt.get('x', '0')) / 100000
-                            y = int(pt.get('y', '0')) / 100000
-                            path_data.append(f'L {x} {y}')
-                        elif tag == 'cubicBezTo':
-                            pts = cmd.findall('.//a:pt', self.namespace)
-                            if len(pts) == 3:
-                                x1 = int(pts[0].get('x', '0')) / 100000
-                                y1 = int(pts[0].get('y', '0')) / 100000
-                                x2 = int(pts[1].get('x', '0')) / 100000
-                                y2 = int(pts[1].get('y', '0')) / 100000
-                                x3 = int(pts[2].get('x', '0')) / 100000
-                                y3 = int(pts[2].get('y', '0')) / 100000
-                                path_data.append(f'C {x1} {y1} {x2} {y2} {x3} {y3}')
-                        elif tag == 'arcTo':
-                            # Convert arc to cubic bezier curves
-                            # This is a simplified version - you might need more complex arc handling
-                            wR = int(cmd.get('wR', '0')) / 100000
-                            hR = int(cmd.get('hR', '0')) / 100000
-                            stAng = int(cmd.get('stAng', '0')) / 60000
-                            swAng = int(cmd.get('swAng', '0')) / 60000
-                            path_data.append(f'A {wR} {hR} {stAng} {swAng > 180} {swAng > 0}')
-                        elif tag == 'close':
-                            path_data.append('Z')
+                        handler = get_handler(cmd.tag)
+                        if handler:
+                            handler(cmd, ops, raw)
+                    
+                    # Convert all coordinates of the path in one pass
+                    values = array('d', [v / 100000 for v in map(int, raw)])
                     
-                    if path_data:
-                        geometry['paths'].append(' '.join(path_data))
+                    # Build one flat token list and join the path once
+                    tokens = []
+                    i = 0
+                    x = y = start_x = start_y = 0
+                    for op, arg in ops:
+                        if op == 'A':
+                            for segment in _arc_to_cubic(x, y, *arg):
+                                tokens.append('C')
+                                tokens += map(str, segment)
+                                x, y = segment[4], segment[5]
+                            continue
+                        
+                        n = 2 * arg
+                        tokens.append(op)
+                        tokens += map(str, values[i:i + n])
+                        i += n
+                        
+                        # Track the current point for arcs
+                        if op == 'Z':
+                            x, y = start_x, start_y
+                        elif n:
+                            x, y = values[i - 2], values[i - 1]
+                            if op == 'M':
+                                start_x, start_y = x, y
+                    
+                    if tokens:
+                        geometry['paths'].append(' '.join(tokens))
             
             return geometry
             
         except Exception as e:
-            print(f"Error extracting custom geometry: {e}")
+            logger.error("Error extracting custom geometry: %s", e)
             return None
     
     def _extract_effects(self, effects):
@@ -166,52 +286,52 @@ class AdvancedShapeHandler:
             effect_list = []
             
             # Extract shadow
-            shadow = effects.find('.//a:outerShdw', self.namespace)
+            shadow = first(_XP_OUTERSHDW(effects))
             if shadow is not None:
                 effect_list.append({
                     'type': 'shadow',
                     'color': self._get_effect_color(shadow),
                     'opacity': int(shadow.get('alpha', '100000')) / 100000,
-                    'blur': int(shadow.get('blurRad', '0')) / 12700,
+                    'blur': int(shadow.get('blurRad', '0')) / EMU_PER_POINT,
                     'offset': {
-                        'x': int(shadow.get('dx', '0')) / 12700,
-                        'y': int(shadow.get('dy', '0')) / 12700
+                        'x': int(shadow.get('dx', '0')) / EMU_PER_POINT,
+                        'y': int(shadow.get('dy', '0')) / EMU_PER_POINT
                     }
                 })
             
             # Extract glow
-            glow = effects.find('.//a:glow', self.namespace)
+            glow = first(_XP_GLOW(effects))
             if glow is not None:
                 effect_list.append({
                     'type': 'glow',
                     'color': self._get_effect_color(glow),
                     'opacity': int(glow.get('alpha', '100000')) / 100000,
-                    'radius': int(glow.get('rad', '0')) / 12700
+                    'radius': int(glow.get('rad', '0')) / EMU_PER_POINT
                 })
             
             # Extract soft edges
-            soft = effects.find('.//a:softEdge', self.namespace)
+            soft = first(_XP_SOFTEDGE(effects))
             if soft is not None:
                 effect_list.append({
                     'type': 'soft-edge',
-                    'radius': int(soft.get('rad', '0')) / 12700
+                    'radius': int(soft.get('rad', '0')) / EMU_PER_POINT
                 })
             
             return effect_list
             
         except Exception as e:
-            print(f"Error extracting effects: {e}")
+            logger.error("Error extracting effects: %s", e)
             return []
     
     def _get_effect_color(self, effect_elem):
         """Extract color from effect element"""
         try:
-            srgb_clr = effect_elem.find('.//a:srgbClr', self.namespace)
+            srgb_clr = first(_XP_SRGB(effect_elem))
             if srgb_clr is not None:
                 return f"#{srgb_clr.get('val')}"
             return '#000000'  # Default black
         except Exception as e:
-            print(f"Error getting effect color: {e}")
+            logger.error("Error getting effect color: %s", e)
             return '#000000'
     
     def convert_to_fabric(self, shape_props):
@@ -240,20 +360,20 @@ class AdvancedShapeHandler:
                         'y2': 0.5,
                         'r2': 0.5
                     },
-                    'colorStops': {
-                        str(stop['offset']): stop['color']
-                        for stop in grad['stops']
-                    }
+                    'colorStops': dict(zip(
+                        map('{:.5f}'.format, grad['stops'][0]),
+                        grad['stops'][1]
+                    ))
                 }
                 
                 if grad['type'] == 'linear':
                     # Convert angle to coordinates
-                    angle = grad['angle'] * Math.PI / 180
+                    cos, sin = _angle_cos_sin(grad['angle'])
                     fabric_props['fill']['coords'] = {
-                        'x1': 0.5 - 0.5 * Math.cos(angle),
-                        'y1': 0.5 - 0.5 * Math.sin(angle),
-                        'x2': 0.5 + 0.5 * Math.cos(angle),
-                        'y2': 0.5 + 0.5 * Math.sin(angle)
+                        'x1': 0.5 - 0.5 * cos,
+                        'y1': 0.5 - 0.5 * sin,
+                        'x2': 0.5 + 0.5 * cos,
+                        'y2': 0.5 + 0.5 * sin
                     }
             
             # Convert custom geometry
@@ -261,14 +381,6 @@ class AdvancedShapeHandler:
                 geom = shape_props['custom_geometry']
                 if geom['paths']:
                     fabric_props['path'] = geom['paths'][0]  # Use first path
-                if geom['rect']:
-                    fabric_props['clipPath'] = {
-                        'type': 'rect',
-                        'left': geom['rect']['l'],
-                        'top': geom['rect']['t'],
-                        'width': geom['rect']['r'] - geom['rect']['l'],
-                        'height': geom['rect']['b'] - geom['rect']['t']
-                    }
             
             # Convert effects
             for effect in shape_props.get('effects', []):
@@ -303,5 +415,5 @@ class AdvancedShapeHandler:
             return fabric_props
             
         except Exception as e:
-            print(f"Error converting to Fabric.js format: {e}")
+            logger.error("Error converting to Fabric.js format: %s", e)
             return {} 
\ No newline at end of file
@@ -1,18 +1,27 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory, send_file
+from flask import Flask, request, jsonify, render_template, send_from_directory, send_file, stream_with_context
 from pptx_fabric_converter import PPTXFabricConverter
 import os
 import io
+import orjson
 
 app = Flask(__name__)
 
 # Configuration
 ENABLE_UI = True  # Set to False to use API-only mode
+USE_X_SENDFILE = False  # Set to True when a front-end server (nginx, Apache) handles X-Sendfile
 UPLOAD_FOLDER = os.path.join('static', 'uploads')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 # Add static folder configuration
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
+# Let the front-end server stream uploaded images with sendfile(2) instead of
+# reading them through Python
+app.config['USE_X_SENDFILE'] = USE_X_SENDFILE
+
+# The converter keeps no per-file state, so one instance serves all requests
+CONVERTER = PPTXFabricConverter()
+
 @app.route('/', methods=['GET'])
 def index():
     if ENABLE_UI:
@@ -33,9 +42,8 @@ def convert_pptx_to_fabric():
         return jsonify({"error": "Invalid file type"}), 400
 
     try:
-        converter = PPTXFabricConverter()
-        fabric_json = converter.pptx_to_fabric(file)
-        return jsonify({"fabric": fabric_json})
+        fabric_json = CONVERTER.pptx_to_fabric(file)
+        return app.response_class(orjson.dumps({"fabric": fabric_json}), mimetype='application/json')
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
@@ -45,15 +53,56 @@ def convert_pptx_to_fabric():
             "details": error_details
         }), 500
 
+@app.route('/pptx-to-fabric/stream', methods=['POST'])
+def stream_pptx_to_fabric():
+    """Same output as /pptx-to-fabric, sent one slide at a time"""
+    if 'file' not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
+    
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"error": "No selected file"}), 400
+    
+    if not file.filename.endswith('.pptx'):
+        return jsonify({"error": "Invalid file type"}), 400
+    
+    try:
+        slides = CONVERTER.iter_slides(file)
+        # Convert the first slide before answering, so a deck that does not
+        # open gets a JSON error rather than a truncated 200 response
+        first_slide = next(slides, None)
+    except Exception as e:
+        import traceback
+        error_details = traceback.format_exc()
+        print("Error details:", error_details)
+        return jsonify({
+            "error": str(e),
+            "details": error_details
+        }), 500
+    
+    def generate():
+        # Only the slide being serialized is held in memory
+        yield b'{"fabric":['
+        if first_slide is not None:
+            yield orjson.dumps(first_slide)
+            for slide_data in slides:
+                yield b','
+                yield orjson.dumps(slide_data)
+        yield b']}'
+    
+    return app.response_class(stream_with_context(generate()), mimetype='application/json')
+
 @app.route('/fabric-to-pptx', methods=['POST'])
 def convert_fabric_to_pptx():
     try:
-        fabric_data = request.json
+        try:
+            fabric_data = orjson.loads(request.get_data())
+        except orjson.JSONDecodeError:
+            fabric_data = None
         if not fabric_data or 'fabric' not in fabric_data:
             return jsonify({"error": "No Fabric.js data provided"}), 400
         
-        converter = PPTXFabricConverter()
-        prs = converter.fabric_to_pptx(fabric_data['fabric'])
+        prs = CONVERTER.fabric_to_pptx(fabric_data['fabric'])
         
         # Save to memory buffer
         pptx_buffer = io.BytesIO()
@@ -79,7 +128,9 @@ def convert_fabric_to_pptx():
 # Optional: Add a route to serve images directly if needed
 @app.route('/static/uploads/<path:filename>')
 def serve_image(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    # send_from_directory answers conditional requests and hands the open file
+    # to the WSGI server's file_wrapper, which uses sendfile(2) where supported
+    return send_from_directory(app.config['UPLOAD_FOLDER'], filename, conditional=True)
 
 if __name__ == '__main__':
     app.run(debug=True)
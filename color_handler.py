@@ -1,25 +1,80 @@
 from pptx.enum.dml import MSO_THEME_COLOR, MSO_FILL
 from pptx.dml.color import RGBColor
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
+import logging
+from ooxml_utils import HEX
+
+logger = logging.getLogger(__name__)
+
+_A_NS = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+_NS = {'a': _A_NS}
+
+# Compiled XPath queries, shared by all handler instances. Theme XML nesting
+# is fixed by the schema, so these use direct child steps instead of './/'.
+_XP_CLRSCHEME = ET.XPath('./a:themeElements/a:clrScheme', namespaces=_NS)
+_XP_SRGB = ET.XPath('./a:srgbClr', namespaces=_NS)
+_XP_SYSCLR = ET.XPath('./a:sysClr', namespaces=_NS)
+_XP_SCHEMECLR = ET.XPath('./a:schemeClr', namespaces=_NS)
+
+# Theme color scheme elements (Clark notation) mapped to the theme colors
+# they define; theme_colors is keyed by MSO_THEME_COLOR members throughout
+_COLOR_MAPPINGS = {
+    '{%s}dk1' % _A_NS: MSO_THEME_COLOR.TEXT_1,
+    '{%s}lt1' % _A_NS: MSO_THEME_COLOR.BACKGROUND_1,
+    '{%s}dk2' % _A_NS: MSO_THEME_COLOR.TEXT_2,
+    '{%s}lt2' % _A_NS: MSO_THEME_COLOR.BACKGROUND_2,
+    '{%s}accent1' % _A_NS: MSO_THEME_COLOR.ACCENT_1,
+    '{%s}accent2' % _A_NS: MSO_THEME_COLOR.ACCENT_2,
+    '{%s}accent3' % _A_NS: MSO_THEME_COLOR.ACCENT_3,
+    '{%s}accent4' % _A_NS: MSO_THEME_COLOR.ACCENT_4,
+    '{%s}accent5' % _A_NS: MSO_THEME_COLOR.ACCENT_5,
+    '{%s}accent6' % _A_NS: MSO_THEME_COLOR.ACCENT_6
+}
+
+# Fill elements (EG_FillProperties) that may appear on spPr/ln/bgPr/rPr
+_FILL_TAGS = frozenset(
+    '{%s}%s' % (_A_NS, name)
+    for name in ('noFill', 'solidFill', 'gradFill', 'blipFill', 'pattFill', 'grpFill')
+)
+
+def _fill_key(fill_parent):
+    """Get a cache key for the fill defined on spPr/ln/bgPr/rPr, or None
+    
+    A resolved color depends only on the fill type and, for a solid fill,
+    on the color element's type and val, so those make up the key.
+    """
+    if fill_parent is None:
+        return None
+    for fill in fill_parent:
+        if fill.tag in _FILL_TAGS:
+            if not len(fill):
+                return (fill.tag,)
+            color = fill[0]
+            return (fill.tag, color.tag, color.get('val'))
+    return ()
 
 class ColorHandler:
     def __init__(self, presentation):
         self.presentation = presentation
         self.theme_colors = self._extract_theme_colors()
         
+        # Resolved colors keyed by the fill they came from (see _fill_key)
+        self._shape_color_cache = {}
+        self._text_color_cache = {}
+        
     def _extract_theme_colors(self):
         """Extract all theme colors from the presentation"""
         theme_colors = {
-            'BACKGROUND_1': '#FFFFFF',  # Default white
-            'BACKGROUND_2': '#F2F2F2',  # Default light gray
-            'TEXT_1': '#000000',        # Default black
-            'TEXT_2': '#666666',        # Default dark gray
-            'ACCENT_1': '#4472C4',      # Default blue
-            'ACCENT_2': '#ED7D31',      # Default orange
-            'ACCENT_3': '#A5A5A5',      # Default gray
-            'ACCENT_4': '#FFC000',      # Default yellow
-            'ACCENT_5': '#5B9BD5',      # Default light blue
-            'ACCENT_6': '#70AD47'       # Default green
+            MSO_THEME_COLOR.BACKGROUND_1: '#FFFFFF',  # Default white
+            MSO_THEME_COLOR.BACKGROUND_2: '#F2F2F2',  # Default light gray
+            MSO_THEME_COLOR.TEXT_1: '#000000',        # Default black
+            MSO_THEME_COLOR.TEXT_2: '#666666',        # Default dark gray
+            MSO_THEME_COLOR.ACCENT_1: '#4472C4',      # Default blue
+            MSO_THEME_COLOR.ACCENT_2: '#ED7D31',      # Default orange
+            MSO_THEME_COLOR.ACCENT_3: '#A5A5A5',      # Default gray
+            MSO_THEME_COLOR.ACCENT_4: '#FFC000',      # Default yellow
+            MSO_THEME_COLOR.ACCENT_5: '#5B9BD5',      # Default light blue
+            MSO_THEME_COLOR.ACCENT_6: '#70AD47'       # Default green
         }
         
         try:
@@ -35,147 +90,167 @@ class ColorHandler:
                     
                     if theme_part and hasattr(theme_part, 'element'):
                         root = theme_part.element
-                        clr_scheme = root.find('.//a:clrScheme', 
-                            {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
+                        clr_schemes = _XP_CLRSCHEME(root)
+                        clr_scheme = clr_schemes[0] if clr_schemes else None
                         
                         if clr_scheme is not None:
-                            # Map theme color elements to their roles
-                            color_mappings = {
-                                'dk1': 'TEXT_1',
-                                'lt1': 'BACKGROUND_1',
-                                'dk2': 'TEXT_2',
-                                'lt2': 'BACKGROUND_2',
-                                'accent1': 'ACCENT_1',
-                                'accent2': 'ACCENT_2',
-                                'accent3': 'ACCENT_3',
-                                'accent4': 'ACCENT_4',
-                                'accent5': 'ACCENT_5',
-                                'accent6': 'ACCENT_6'
-                            }
-                            
-                            for elem_name, theme_name in color_mappings.items():
-                                elem = clr_scheme.find(f'.//a:{elem_name}', 
-                                    {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
-                                if elem is not None:
+                            # Walk the scheme's children once in document order
+                            for elem in clr_scheme:
+                                theme_name = _COLOR_MAPPINGS.get(elem.tag)
+                                if theme_name:
                                     color = self._extract_color_from_element(elem)
                                     if color:
                                         theme_colors[theme_name] = color
         except Exception as e:
-            print(f"Error extracting theme colors: {e}")
+            logger.error("Error extracting theme colors: %s", e)
             
-        print(f"Extracted theme colors: {theme_colors}")  # Debug log
+        logger.debug("Extracted theme colors: %s", theme_colors)
         return theme_colors
     
     def _extract_color_from_element(self, element):
         """Extract color value from XML element"""
         try:
             # Check for sRGB color
-            srgb = element.find('.//a:srgbClr', 
-                {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
-            if srgb is not None:
+            srgb_list = _XP_SRGB(element)
+            if srgb_list:
+                srgb = srgb_list[0]
                 color = f'#{srgb.get("val")}'
-                print(f"Extracted color for element: {color}")  # Debug log
+                logger.debug("Extracted color for element: %s", color)
                 return color
             
             # Check for system color
-            sys_clr = element.find('.//a:sysClr', 
-                {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
-            if sys_clr is not None:
+            sys_clr_list = _XP_SYSCLR(element)
+            if sys_clr_list:
+                sys_clr = sys_clr_list[0]
                 color = f'#{sys_clr.get("lastClr", sys_clr.get("val"))}'
-                print(f"Extracted color for element: {color}")  # Debug log
+                logger.debug("Extracted color for element: %s", color)
                 return color
             
             # Check for scheme color
-            scheme_clr = element.find('.//a:schemeClr', 
-                {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
-            if scheme_clr is not None:
-                val = scheme_clr.get('val')
-                color = self.theme_colors.get(val.upper(), None)
-                print(f"Extracted color for element: {color}")  # Debug log
+            scheme_clr_list = _XP_SCHEMECLR(element)
+            if scheme_clr_list:
+                scheme_clr = scheme_clr_list[0]
+                try:
+                    theme_color = MSO_THEME_COLOR.from_xml(scheme_clr.get('val'))
+                except KeyError:
+                    theme_color = None
+                color = self.theme_colors.get(theme_color, None)
+                logger.debug("Extracted color for element: %s", color)
                 return color
                 
         except Exception as e:
-            print(f"Error extracting color from element: {e}")
+            logger.error("Error extracting color from element: %s", e)
         return None
     
     def get_shape_color(self, shape):
         """Get color information for a shape"""
         try:
-            print(f"Getting color for shape: {shape}")  # Debug log
-            if not hasattr(shape, 'fill'):
-                print("Shape has no fill attribute")  # Debug log
+            key = _fill_key(shape.fill._xPr)
+        except AttributeError:
+            key = None
+        if key is None:
+            return self._resolve_shape_color(shape)
+        
+        color = self._shape_color_cache.get(key)
+        if color is None:
+            color = self._shape_color_cache[key] = self._resolve_shape_color(shape)
+        return color
+    
+    def _resolve_shape_color(self, shape):
+        """Work out the color of a shape from its fill"""
+        try:
+            try:
+                fill = shape.fill
+            except AttributeError:
+                logger.debug("Shape has no fill attribute")
                 return 'transparent'
-                
-            fill = shape.fill
-            print(f"Fill type: {fill.type if fill else 'None'}")  # Debug log
             
             # Check for no fill - MSO_FILL.BACKGROUND is used when there's no fill
             if fill is None or fill.type == MSO_FILL.BACKGROUND:
-                print("Shape has no fill (background)")  # Debug log
+                logger.debug("Shape has no fill (background)")
                 return 'transparent'
                 
             # Handle solid fill
             if fill.type == MSO_FILL.SOLID:
-                if hasattr(fill, 'fore_color') and fill.fore_color:
-                    color = fill.fore_color
-                    print(f"Fill fore_color: {color}")  # Debug log
-                    
-                    # Direct RGB color
-                    if hasattr(color, 'rgb') and color.rgb:
-                        rgb_color = f'#{color.rgb[0]:02x}{color.rgb[1]:02x}{color.rgb[2]:02x}'
-                        print(f"Using RGB color: {rgb_color}")  # Debug log
-                        print(f"Extracted color for shape: {rgb_color}")  # Debug log
-                        return rgb_color
-                    
-                    # Theme color
-                    if hasattr(color, 'theme_color'):
-                        theme_color = str(color.theme_color)
-                        print(f"Using theme color: {theme_color}, RGB: {self.theme_colors[theme_color]}")  # Debug log
-                        if theme_color in self.theme_colors:
-                            return self.theme_colors[theme_color]
-                        else:
-                            print(f"Theme color {theme_color} not found in theme_colors")  # Debug log
-                            return 'transparent'
+                color = fill.fore_color
+                
+                # Direct RGB color
+                try:
+                    rgb = color.rgb
+                except AttributeError:
+                    rgb = None
+                if rgb:
+                    return '#' + HEX[rgb[0]] + HEX[rgb[1]] + HEX[rgb[2]]
+                
+                # Theme color
+                try:
+                    theme_color = color.theme_color
+                except AttributeError:
+                    pass
+                else:
+                    if theme_color in self.theme_colors:
+                        return self.theme_colors[theme_color]
+                    logger.debug("Theme color %s not found in theme_colors", theme_color)
+                    return 'transparent'
             
             # Handle gradient fill
             if fill.type == MSO_FILL.GRADIENT:
-                print("Gradient fill detected")  # Debug log
                 # Implement gradient handling logic here
                 return 'gradient'  # Placeholder
             
-            print("No valid fill color found")  # Debug log
+            logger.debug("No valid fill color found")
             return 'transparent'
             
         except Exception as e:
-            print(f"Error getting shape color: {e}")
-            print(f"Shape properties: {dir(shape)}")  # Debug log
+            logger.error("Error getting shape color: %s", e)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Shape properties: %s", dir(shape))
             return 'transparent'
     
     def get_text_color(self, run):
         """Get text color from a run"""
         try:
-            print(f"Getting text color for run: {run.text}")  # Debug log
-            if hasattr(run, 'font') and hasattr(run.font, 'color'):
+            rPr = run._r.rPr
+            key = _fill_key(rPr) if rPr is not None else ()
+        except AttributeError:
+            key = None
+        if key is None:
+            return self._resolve_text_color(run)
+        
+        color = self._text_color_cache.get(key)
+        if color is None:
+            color = self._text_color_cache[key] = self._resolve_text_color(run)
+        return color
+    
+    def _resolve_text_color(self, run):
+        """Work out the color of a run from its font"""
+        try:
+            try:
                 color = run.font.color
-                print(f"Font color object: {color}")  # Debug log
-                
-                # Direct RGB color
-                if hasattr(color, 'rgb') and color.rgb:
-                    rgb_color = f'#{color.rgb[0]:02x}{color.rgb[1]:02x}{color.rgb[2]:02x}'
-                    print(f"Using RGB color: {rgb_color}")  # Debug log
-                    return rgb_color
-                
-                # Theme color
-                if hasattr(color, 'theme_color'):
-                    theme_color = str(color.theme_color)
-                    print(f"Using theme color: {theme_color}")  # Debug log
-                    if theme_color in self.theme_colors:
-                        return self.theme_colors[theme_color]
+            except AttributeError:
+                return '#000000'  # Default black
+            
+            # Direct RGB color
+            try:
+                rgb = color.rgb
+            except AttributeError:
+                rgb = None
+            if rgb:
+                return '#' + HEX[rgb[0]] + HEX[rgb[1]] + HEX[rgb[2]]
+            
+            # Theme color
+            try:
+                theme_color = color.theme_color
+            except AttributeError:
+                pass
+            else:
+                if theme_color in self.theme_colors:
+                    return self.theme_colors[theme_color]
             
-            print("Using default black color")  # Debug log
             return '#000000'  # Default black
             
         except Exception as e:
-            print(f"Error getting text color: {e}")
-            print(f"Run properties: {dir(run)}")  # Debug log
-            return '#000000'  # Default black 
\ No newline at end of file
+            logger.error("Error getting text color: %s", e)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Run properties: %s", dir(run))
+            return '#000000'  # Default black
\ No newline at end of file
@@ -0,0 +1,18 @@
+import base64
+try:
+    # Optional SIMD base64 encoder, a drop-in for base64.b64encode
+    from pybase64 import b64encode
+except ImportError:
+    b64encode = base64.b64encode
+
+# EMU in a point. Values are divided by it rather than multiplied by its
+# reciprocal, which is inexact and puts noise like 3.0000000000000004 in the
+# output
+EMU_PER_POINT = 914400 // 72
+
+# Two-digit lowercase hex of every byte value, for formatting RGB colors
+HEX = tuple(f'{i:02x}' for i in range(256))
+
+def first(nodes):
+    """Return the first node of an XPath result, or None"""
+    return nodes[0] if nodes else None
@@ -1,6 +1,8 @@
 from pptx import Presentation
-from pptx.util import Pt, Inches
+from pptx.util import Pt
 from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.shapes.shapetree import SlideShapeFactory
+from pptx.enum.text import PP_ALIGN
 from pptx.dml.color import RGBColor
 import json
 import base64
@@ -10,148 +12,288 @@ import zipfile
 import tempfile
 import shutil
 import os
+import logging
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
 from color_handler import ColorHandler
 from text_handler import TextHandler
 from shape_handler import ShapeHandler
+from ooxml_utils import EMU_PER_POINT
+
+logger = logging.getLogger(__name__)
+
+# Processed decks up to this size are kept in memory instead of on disk
+SPOOL_MAX_SIZE = 50 * 1024 * 1024
+
+# Threads used to fix XML members while preprocessing
+PREPROCESS_WORKERS = min(8, os.cpu_count() or 1)
+
+_P_NS = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+
+# Members sniffed for invalid namespace URIs before fixing a whole deck
+_SNIFF_MEMBERS = ('ppt/presentation.xml', 'ppt/slides/slide1.xml')
+
+# Children of a shape tree that are shapes
+_SHAPE_TAGS = tuple(
+    '{%s}%s' % (_P_NS, tag)
+    for tag in ('sp', 'grpSp', 'graphicFrame', 'cxnSp', 'pic', 'contentPart')
+)
+
+# Namespace declarations whose URI ends in a stray backslash
+_NS_BACKSLASH_RE = re.compile(rb'(xmlns:[^=]+="[^"]+)\\"')
+
+# Known namespace URIs with a trailing backslash
+_NAMESPACE_FIXES = {
+    b'http://schemas.microsoft.com/office/drawing/2014/main\\': b'http://schemas.microsoft.com/office/drawing/2014/main',
+    b'http://schemas.microsoft.com/office/powerpoint/2010/main\\': b'http://schemas.microsoft.com/office/powerpoint/2010/main',
+    b'http://schemas.microsoft.com/office/word/2010/wordprocessingDrawing\\': b'http://schemas.microsoft.com/office/word/2010/wordprocessingDrawing'
+}
+
+# Fabric.js text alignment -> PowerPoint paragraph alignment
+_ALIGN_MAP = {
+    'left': PP_ALIGN.LEFT,
+    'center': PP_ALIGN.CENTER,
+    'right': PP_ALIGN.RIGHT,
+    'justify': PP_ALIGN.JUSTIFY
+}
+
+# Numbers of an rgb(...) color
+_RGB_NUM_RE = re.compile(r'\d+')
+
+@lru_cache(maxsize=512)
+def _parse_color_cached(color):
+    """Parse a color string to an RGB tuple, or None if it is not hex or rgb(...)"""
+    if color.startswith('#'):
+        # Hex color
+        return tuple(bytes.fromhex(color.lstrip('#')[:6]))
+    elif color.startswith('rgb'):
+        # RGB color
+        return tuple(map(int, _RGB_NUM_RE.findall(color)))
+    return None
+
+# RGBColor is an immutable tuple, so one instance is shared per color
+@lru_cache(maxsize=512)
+def _rgb_color(rgb):
+    """Get the RGBColor for an (r, g, b) tuple"""
+    return RGBColor(*rgb)
 
 class PPTXFabricConverter:
     def __init__(self):
-        self.debug = True  # Enable debug logging
+        # Shared by every upload this converter preprocesses
+        self._pool = ThreadPoolExecutor(max_workers=PREPROCESS_WORKERS)
         
     def _fix_invalid_namespace_uri(self, xml_content):
-        """Fix invalid namespace URIs in XML content"""
+        """Fix invalid namespace URIs in raw XML bytes"""
+        # Every fix removes a backslash before a closing quote, so content
+        # without one is already valid
+        if b'\\"' not in xml_content:
+            return xml_content
+        
         # Fix backslashes in namespace URIs
-        xml_content = re.sub(r'xmlns:[^=]+="[^"]+\\"', lambda m: m.group(0)[:-1] + '"', xml_content)
+        xml_content = _NS_BACKSLASH_RE.sub(rb'\1"', xml_content)
         
         # Fix specific problematic namespaces
-        namespace_fixes = {
-            'http://schemas.microsoft.com/office/drawing/2014/main\\': 'http://schemas.microsoft.com/office/drawing/2014/main',
-            'http://schemas.microsoft.com/office/powerpoint/2010/main\\': 'http://schemas.microsoft.com/office/powerpoint/2010/main',
-            'http://schemas.microsoft.com/office/word/2010/wordprocessingDrawing\\': 'http://schemas.microsoft.com/office/word/2010/wordprocessingDrawing'
-        }
-        
-        for invalid, valid in namespace_fixes.items():
+        for invalid, valid in _NAMESPACE_FIXES.items():
             xml_content = xml_content.replace(invalid, valid)
             
         return xml_content
         
-    def _preprocess_pptx_file(self, pptx_file):
-        """Preprocess PPTX file to fix any XML issues"""
-        # Create a temporary file to store the processed PPTX
-        temp_dir = tempfile.mkdtemp()
+    def _fix_member(self, zip_ref, member):
+        """Fix one XML member, returning its fixed bytes or None if unchanged"""
         try:
-            # Save the uploaded file to a temporary location
-            temp_pptx_path = os.path.join(temp_dir, 'original.pptx')
-            pptx_file.save(temp_pptx_path)
+            content = zip_ref.read(member)
             
-            # Extract the PPTX file
-            with zipfile.ZipFile(temp_pptx_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_dir)
-            
-            # Process XML files
-            for root, _, files in os.walk(temp_dir):
-                for file in files:
-                    if file.endswith('.xml'):
-                        file_path = os.path.join(root, file)
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                            
-                            # Fix invalid namespace URIs
-                            fixed_content = self._fix_invalid_namespace_uri(content)
-                            
-                            with open(file_path, 'w', encoding='utf-8') as f:
-                                f.write(fixed_content)
-                        except Exception as e:
-                            print(f"Error processing file {file_path}: {e}")
-                            continue
+            # Fix invalid namespace URIs
+            fixed_content = self._fix_invalid_namespace_uri(content)
+            if fixed_content != content:
+                return fixed_content
+        except Exception as e:
+            logger.error("Error processing file %s: %s", member.filename, e)
+        return None
+    
+    def _fix_members(self, zip_ref):
+        """Fix the XML members of a zip that contain invalid namespace URIs
+        
+        Members are independent and inflating them releases the GIL, so they
+        are read and fixed on the converter's thread pool. Returns a
+        {member name: fixed bytes} dict holding only the members that needed
+        fixing.
+        """
+        members = [
+            member for member in zip_ref.infolist()
+            if member.filename.endswith('.xml')
+        ]
+        results = self._pool.map(lambda member: self._fix_member(zip_ref, member), members)
+        return {
+            member.filename: fixed_content
+            for member, fixed_content in zip(members, results)
+            if fixed_content is not None
+        }
+    
+    def _write_fixed_zip(self, zip_ref, target, fixed):
+        """Copy a zip to target, replacing the members in fixed
+        
+        Untouched members are streamed across with their original
+        compression, so media stored uncompressed is not deflated, and the
+        fixed ones are written from memory. target is a path or a writable
+        binary file.
+        """
+        with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as new_zip:
+            for member in zip_ref.infolist():
+                if member.filename in fixed:
+                    new_zip.writestr(member.filename, fixed[member.filename])
+                else:
+                    info = zipfile.ZipInfo(member.filename, member.date_time)
+                    info.compress_type = member.compress_type
+                    info.external_attr = member.external_attr
+                    with zip_ref.open(member) as src, new_zip.open(info, 'w') as dst:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+    
+    def _sniff_is_clean(self, zip_ref):
+        """Check the members most likely to carry invalid namespace URIs"""
+        names = set(zip_ref.namelist())
+        for name in _SNIFF_MEMBERS:
+            if name in names and b'\\"' in zip_ref.read(name):
+                return False
+        return True
+    
+    def _preprocess_pptx_file(self, pptx_file):
+        """Preprocess PPTX file to fix any XML issues
+        
+        Returns a spooled temporary file holding the processed PPTX. It stays
+        in memory up to SPOOL_MAX_SIZE and only larger decks go to disk.
+        """
+        spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        try:
+            # Copy the upload in large chunks rather than Werkzeug's default
+            # 16 KiB
+            pptx_file.save(spooled, buffer_size=1 << 20)
             
-            # Create a new PPTX file
-            new_pptx_path = os.path.join(temp_dir, 'fixed.pptx')
-            with zipfile.ZipFile(new_pptx_path, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
-                for root, _, files in os.walk(temp_dir):
-                    for file in files:
-                        if file not in ['original.pptx', 'fixed.pptx']:
-                            file_path = os.path.join(root, file)
-                            arcname = os.path.relpath(file_path, temp_dir)
-                            zip_ref.write(file_path, arcname)
+            with zipfile.ZipFile(spooled, 'r') as zip_ref:
+                # Decks that pass the sniff are used as uploaded; the rare
+                # miss is fixed when the presentation fails to load
+                if self._sniff_is_clean(zip_ref):
+                    return spooled
+                
+                fixed = self._fix_members(zip_ref)
+                if not fixed:
+                    return spooled
+                
+                # Create a new PPTX file
+                fixed_pptx = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+                try:
+                    self._write_fixed_zip(zip_ref, fixed_pptx, fixed)
+                except Exception:
+                    fixed_pptx.close()
+                    raise
             
-            return new_pptx_path
+            spooled.close()
+            return fixed_pptx
             
         except Exception as e:
-            print(f"Error preprocessing PPTX file: {e}")
-            return temp_pptx_path  # Return original file if preprocessing fails
-        
-        finally:
-            try:
-                # Clean up the original file
-                if os.path.exists(temp_pptx_path):
-                    os.remove(temp_pptx_path)
-            except Exception as e:
-                print(f"Error cleaning up temporary file: {e}")
+            logger.error("Error preprocessing PPTX file: %s", e)
+            # Return original file if preprocessing fails, rewound since the
+            # zip reader left it part way through
+            spooled.seek(0)
+            return spooled
+    
+    def _load_presentation(self, pptx_path):
+        """Load a preprocessed PPTX path or file, fixing any member the sniff missed"""
+        try:
+            return Presentation(pptx_path)
+        except etree.XMLSyntaxError:
+            with zipfile.ZipFile(pptx_path, 'r') as zip_ref:
+                fixed = self._fix_members(zip_ref)
+                if not fixed:
+                    raise
+                
+                # Fix in memory, leaving the preprocessed file untouched
+                buffer = io.BytesIO()
+                self._write_fixed_zip(zip_ref, buffer, fixed)
+            buffer.seek(0)
+            return Presentation(buffer)
         
     def pptx_to_fabric(self, pptx_file):
         """Convert PowerPoint file to Fabric.js JSON format"""
-        processed_pptx = None
+        return list(self.iter_slides(pptx_file))
+    
+    def iter_slides(self, pptx_file):
+        """Convert PowerPoint file to Fabric.js JSON format one slide at a time
+        
+        Returns an iterator yielding the Fabric.js data of each slide as soon
+        as it is converted, so only one slide's objects are alive at a time.
+        The upload is preprocessed straight away, while it is still open.
+        """
+        # Preprocess the PPTX file
+        processed_pptx = self._preprocess_pptx_file(pptx_file)
+        return self._iter_processed_slides(processed_pptx)
+    
+    def _iter_processed_slides(self, processed_pptx):
+        """Yield the converted slides of a preprocessed file, then close it"""
         try:
-            # Preprocess the PPTX file
-            processed_pptx = self._preprocess_pptx_file(pptx_file)
+            yield from self._iter_slides(processed_pptx)
             
-            # Load presentation
-            prs = Presentation(processed_pptx)
+        except Exception as e:
+            logger.error("Error converting PPTX to Fabric: %s", e)
+            raise
+        finally:
+            self._cleanup_processed_pptx(processed_pptx)
+    
+    def _iter_slides(self, pptx_path):
+        """Yield the converted slides of a preprocessed PowerPoint file"""
+        # Load presentation
+        prs = self._load_presentation(pptx_path)
+        
+        # Initialize handlers
+        color_handler = ColorHandler(prs)
+        text_handler = TextHandler(color_handler)
+        shape_handler = ShapeHandler(color_handler, text_handler)
+        
+        # Process each slide
+        for slide_index, slide in enumerate(prs.slides):
+            logger.debug("Processing slide %d", slide_index + 1)
             
-            # Initialize handlers
-            color_handler = ColorHandler(prs)
-            text_handler = TextHandler(color_handler)
-            shape_handler = ShapeHandler(color_handler, text_handler)
+            slide_data = {
+                "objects": [],
+                "width": prs.slide_width / EMU_PER_POINT,  # Convert EMU to points
+                "height": prs.slide_height / EMU_PER_POINT,
+                "slideNumber": slide_index + 1,
+                "background": self._get_slide_background(slide, color_handler)
+            }
             
-            # Process each slide
-            slides_data = []
-            for slide_index, slide in enumerate(prs.slides):
-                if self.debug:
-                    print(f"\nProcessing slide {slide_index + 1}")
-                
-                slide_data = {
-                    "objects": [],
-                    "width": prs.slide_width / 12700,  # Convert EMU to points
-                    "height": prs.slide_height / 12700,
-                    "slideNumber": slide_index + 1,
-                    "background": self._get_slide_background(slide, color_handler)
-                }
-                
-                # Process shapes
-                for shape in slide.shapes:
-                    if self.debug:
-                        print(f"\nShape type: {shape.shape_type}")
-                        print(f"Shape name: {shape.name}")
-                        if hasattr(shape, 'text'):
-                            print(f"Shape text: {shape.text}")
-                    
-                    shape_data = shape_handler.process_shape(shape)
-                    if shape_data:
-                        if shape_data["type"] == "group":
-                            slide_data["objects"].extend(shape_data["objects"])
-                        else:
-                            slide_data["objects"].append(shape_data)
+            # Process shapes
+            for shape in self._iter_shapes(slide):
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Shape type: %s", shape.shape_type)
+                    logger.debug("Shape name: %s", shape.name)
+                    try:
+                        logger.debug("Shape text: %s", shape.text)
+                    except AttributeError:
+                        pass
                 
-                slides_data.append(slide_data)
+                shape_data = shape_handler.process_shape(shape)
+                if shape_data:
+                    if shape_data["type"] == "group":
+                        slide_data["objects"].extend(shape_data["objects"])
+                    else:
+                        slide_data["objects"].append(shape_data)
             
-            return slides_data
-            
-        except Exception as e:
-            print(f"Error converting PPTX to Fabric: {e}")
-            raise
-        finally:
-            # Clean up the processed file
-            if processed_pptx and os.path.exists(processed_pptx):
-                try:
-                    os.remove(processed_pptx)
-                    # Clean up the parent directory
-                    temp_dir = os.path.dirname(processed_pptx)
-                    if os.path.exists(temp_dir):
-                        shutil.rmtree(temp_dir, ignore_errors=True)
-                except Exception as e:
-                    print(f"Error cleaning up temporary file: {e}")
+            yield slide_data
+    
+    def _iter_shapes(self, slide):
+        """Yield the shapes of a slide, selecting shape elements in lxml"""
+        shapes = slide.shapes
+        for shape_elm in slide.element.cSld.spTree.iterchildren(*_SHAPE_TAGS):
+            yield SlideShapeFactory(shape_elm, shapes)
+    
+    def _cleanup_processed_pptx(self, processed_pptx):
+        """Close a preprocessed PPTX file, discarding its contents"""
+        if processed_pptx:
+            try:
+                processed_pptx.close()
+            except Exception as e:
+                logger.error("Error cleaning up temporary file: %s", e)
     
     def fabric_to_pptx(self, fabric_data, template_pptx=None):
         """Convert Fabric.js JSON format back to PowerPoint"""
@@ -161,8 +303,12 @@ class PPTXFabricConverter:
             
             # Set slide size if not using template
             if not template_pptx:
-                prs.slide_width = int(fabric_data[0]["width"] * 12700)
-                prs.slide_height = int(fabric_data[0]["height"] * 12700)
+                prs.slide_width = int(fabric_data[0]["width"] * EMU_PER_POINT)
+                prs.slide_height = int(fabric_data[0]["height"] * EMU_PER_POINT)
+            
+            # Decoded images keyed by their data URL, so an image repeated
+            # across slides is decoded once and stored as one image part
+            image_cache = {}
             
             # Process each slide
             for slide_data in fabric_data:
@@ -174,12 +320,12 @@ class PPTXFabricConverter:
                 
                 # Process objects
                 for obj in slide_data["objects"]:
-                    self._create_shape_from_fabric(slide, obj)
+                    self._create_shape_from_fabric(slide, obj, image_cache)
             
             return prs
             
         except Exception as e:
-            print(f"Error converting Fabric to PPTX: {e}")
+            logger.error("Error converting Fabric to PPTX: %s", e)
             raise
     
     def _get_slide_background(self, slide, color_handler):
@@ -199,7 +345,7 @@ class PPTXFabricConverter:
                     }
             return None
         except Exception as e:
-            print(f"Error getting slide background: {e}")
+            logger.error("Error getting slide background: %s", e)
             return None
     
     def _set_slide_background(self, slide, background):
@@ -210,31 +356,31 @@ class PPTXFabricConverter:
                 color = self._parse_color(background["fill"])
                 if color:
                     fill.solid()
-                    fill.fore_color.rgb = RGBColor(*color)
+                    fill.fore_color.rgb = _rgb_color(color)
         except Exception as e:
-            print(f"Error setting slide background: {e}")
+            logger.error("Error setting slide background: %s", e)
     
-    def _create_shape_from_fabric(self, slide, obj):
+    def _create_shape_from_fabric(self, slide, obj, image_cache):
         """Create PowerPoint shape from Fabric.js object"""
         try:
             shape = None
             
             if obj["type"] == "textbox":
                 shape = slide.shapes.add_textbox(
-                    Inches(obj["left"] / 72),
-                    Inches(obj["top"] / 72),
-                    Inches(obj["width"] / 72),
-                    Inches(obj["height"] / 72)
+                    int(obj["left"] * EMU_PER_POINT),
+                    int(obj["top"] * EMU_PER_POINT),
+                    int(obj["width"] * EMU_PER_POINT),
+                    int(obj["height"] * EMU_PER_POINT)
                 )
                 self._set_text_properties(shape.text_frame, obj)
                 
             elif obj["type"] == "rect":
                 shape = slide.shapes.add_shape(
                     MSO_SHAPE.RECTANGLE,
-                    Inches(obj["left"] / 72),
-                    Inches(obj["top"] / 72),
-                    Inches(obj["width"] / 72),
-                    Inches(obj["height"] / 72)
+                    int(obj["left"] * EMU_PER_POINT),
+                    int(obj["top"] * EMU_PER_POINT),
+                    int(obj["width"] * EMU_PER_POINT),
+                    int(obj["height"] * EMU_PER_POINT)
                 )
                 self._set_shape_properties(shape, obj)
                 
@@ -242,104 +388,97 @@ class PPTXFabricConverter:
                 # Convert path to freeform shape
                 shape = slide.shapes.add_shape(
                     MSO_SHAPE.FREEFORM,
-                    Inches(obj["left"] / 72),
-                    Inches(obj["top"] / 72),
-                    Inches(obj["width"] / 72),
-                    Inches(obj["height"] / 72)
+                    int(obj["left"] * EMU_PER_POINT),
+                    int(obj["top"] * EMU_PER_POINT),
+                    int(obj["width"] * EMU_PER_POINT),
+                    int(obj["height"] * EMU_PER_POINT)
                 )
                 self._set_shape_properties(shape, obj)
                 
             elif obj["type"] == "image":
                 # Convert base64 image to bytes
-                if "src" in obj and obj["src"].startswith("data:image"):
-                    img_data = base64.b64decode(obj["src"].split(",")[1])
+                src = obj.get("src")
+                if src and src.startswith("data:image"):
+                    img_data = image_cache.get(src)
+                    if img_data is None:
+                        img_data = image_cache[src] = base64.b64decode(src.split(",")[1])
                     shape = slide.shapes.add_picture(
                         io.BytesIO(img_data),
-                        Inches(obj["left"] / 72),
-                        Inches(obj["top"] / 72),
-                        Inches(obj["width"] / 72),
-                        Inches(obj["height"] / 72)
+                        int(obj["left"] * EMU_PER_POINT),
+                        int(obj["top"] * EMU_PER_POINT),
+                        int(obj["width"] * EMU_PER_POINT),
+                        int(obj["height"] * EMU_PER_POINT)
                     )
             
-            if shape and "angle" in obj:
-                shape.rotation = float(obj["angle"])
+            if shape and (angle := obj.get("angle")) is not None:
+                shape.rotation = float(angle)
             
         except Exception as e:
-            print(f"Error creating shape from Fabric object: {e}")
+            logger.error("Error creating shape from Fabric object: %s", e)
     
     def _set_text_properties(self, text_frame, obj):
         """Set text properties from Fabric.js object"""
         try:
-            if "text" not in obj:
+            get = obj.get
+            text = get("text")
+            if text is None:
                 return
                 
             paragraph = text_frame.paragraphs[0]
             run = paragraph.add_run()
-            run.text = obj["text"]
+            run.text = text
             
             font = run.font
-            if "fontSize" in obj:
-                font.size = Pt(obj["fontSize"])
-            if "fontFamily" in obj:
-                font.name = obj["fontFamily"]
-            if "fill" in obj:
-                color = self._parse_color(obj["fill"])
+            if (font_size := get("fontSize")) is not None:
+                font.size = Pt(font_size)
+            if (font_family := get("fontFamily")) is not None:
+                font.name = font_family
+            if (fill := get("fill")) is not None:
+                color = self._parse_color(fill)
                 if color:
-                    font.color.rgb = RGBColor(*color)
-            if "fontWeight" in obj:
-                font.bold = obj["fontWeight"] == "bold"
-            if "fontStyle" in obj:
-                font.italic = obj["fontStyle"] == "italic"
-            if "textAlign" in obj:
-                paragraph.alignment = self._get_alignment(obj["textAlign"])
+                    font.color.rgb = _rgb_color(color)
+            if (font_weight := get("fontWeight")) is not None:
+                font.bold = font_weight == "bold"
+            if (font_style := get("fontStyle")) is not None:
+                font.italic = font_style == "italic"
+            if (text_align := get("textAlign")) is not None:
+                paragraph.alignment = self._get_alignment(text_align)
                 
         except Exception as e:
-            print(f"Error setting text properties: {e}")
+            logger.error("Error setting text properties: %s", e)
     
     def _set_shape_properties(self, shape, obj):
         """Set shape properties from Fabric.js object"""
         try:
-            if "fill" in obj:
+            get = obj.get
+            if (fill_value := get("fill")) is not None:
                 fill = shape.fill
-                color = self._parse_color(obj["fill"])
+                color = self._parse_color(fill_value)
                 if color:
                     fill.solid()
-                    fill.fore_color.rgb = RGBColor(*color)
+                    fill.fore_color.rgb = _rgb_color(color)
                     
-            if "stroke" in obj:
+            if (stroke := get("stroke")) is not None:
                 line = shape.line
-                color = self._parse_color(obj["stroke"])
+                color = self._parse_color(stroke)
                 if color:
-                    line.color.rgb = RGBColor(*color)
-                if "strokeWidth" in obj:
-                    line.width = Pt(obj["strokeWidth"])
+                    line.color.rgb = _rgb_color(color)
+                if (stroke_width := get("strokeWidth")) is not None:
+                    line.width = Pt(stroke_width)
                     
         except Exception as e:
-            print(f"Error setting shape properties: {e}")
+            logger.error("Error setting shape properties: %s", e)
     
     def _parse_color(self, color):
         """Parse color string to RGB tuple"""
         try:
             if isinstance(color, str):
-                if color.startswith('#'):
-                    # Hex color
-                    color = color.lstrip('#')
-                    return tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
-                elif color.startswith('rgb'):
-                    # RGB color
-                    return tuple(map(int, re.findall(r'\d+', color)))
+                return _parse_color_cached(color)
             return None
         except Exception as e:
-            print(f"Error parsing color: {e}")
+            logger.error("Error parsing color: %s", e)
             return None
     
     def _get_alignment(self, align):
         """Convert Fabric.js alignment to PowerPoint alignment"""
-        from pptx.enum.text import PP_ALIGN
-        align_map = {
-            'left': PP_ALIGN.LEFT,
-            'center': PP_ALIGN.CENTER,
-            'right': PP_ALIGN.RIGHT,
-            'justify': PP_ALIGN.JUSTIFY
-        }
-        return align_map.get(align.lower(), PP_ALIGN.LEFT) 
\ No newline at end of file
+        return _ALIGN_MAP.get(align.lower(), PP_ALIGN.LEFT) 
\ No newline at end of file
@@ -6,24 +6,81 @@ from pptx.enum.shapes import MSO_SHAPE_TYPE
 from pptx.enum.dml import MSO_FILL, MSO_THEME_COLOR
 from pptx.enum.shapes import MSO_SHAPE
 import math
-import base64
 import io
 import zipfile
 import tempfile
-import shutil
 import re
+from lxml import etree
 from color_handler import ColorHandler
 from text_handler import TextHandler
 from shape_handler import ShapeHandler
+from ooxml_utils import EMU_PER_POINT, HEX, b64encode, first
+
+_A = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+_NS = {'a': _A}
+
+# Clark-notation tags of the DrawingML path elements
+_TAG_PT = f'{{{_A}}}pt'
+_TAG_MOVETO = f'{{{_A}}}moveTo'
+_TAG_LNTO = f'{{{_A}}}lnTo'
+_TAG_CUBICBEZTO = f'{{{_A}}}cubicBezTo'
+_TAG_ARCTO = f'{{{_A}}}arcTo'
+_TAG_CLOSE = f'{{{_A}}}close'
+_FIND_PT = './/' + _TAG_PT
+
+# Compiled XPath queries, built once at import
+_XP_GRADFILL = etree.XPath('(.//a:gradFill)[1]', namespaces=_NS)
+_XP_FIRST_PATH = etree.XPath('(.//a:path)[1]', namespaces=_NS)
+_XP_GS = etree.XPath('.//a:gs', namespaces=_NS)
+_XP_GS_COLORS = {
+    'srgbClr': etree.XPath('(.//a:srgbClr)[1]', namespaces=_NS),
+    'schemeClr': etree.XPath('(.//a:schemeClr)[1]', namespaces=_NS),
+    'sysClr': etree.XPath('(.//a:sysClr)[1]', namespaces=_NS)
+}
+# sp -> spPr -> custGeom -> pathLst -> path, each at any depth below the last
+_XP_CUSTOM_PATHS = etree.XPath(
+    'descendant-or-self::a:sp/descendant-or-self::a:spPr'
+    '/descendant-or-self::a:custGeom/descendant-or-self::a:pathLst'
+    '/descendant-or-self::a:path',
+    namespaces=_NS
+)
+
+# Theme color -> attribute of the theme's color scheme holding it
+_THEME_SCHEME_ATTRS = {
+    MSO_THEME_COLOR.ACCENT_1: 'accent1',
+    MSO_THEME_COLOR.ACCENT_2: 'accent2',
+    MSO_THEME_COLOR.ACCENT_3: 'accent3',
+    MSO_THEME_COLOR.ACCENT_4: 'accent4',
+    MSO_THEME_COLOR.ACCENT_5: 'accent5',
+    MSO_THEME_COLOR.ACCENT_6: 'accent6',
+    MSO_THEME_COLOR.BACKGROUND_1: 'bg1',
+    MSO_THEME_COLOR.BACKGROUND_2: 'bg2',
+    MSO_THEME_COLOR.TEXT_1: 'tx1',
+    MSO_THEME_COLOR.TEXT_2: 'tx2'
+}
+
+# Namespace declaration whose URI ends in a stray backslash; group 1 is the
+# declaration up to, but not including, the backslash
+_NS_URI_RE = re.compile(r'(xmlns:[^=]+="[^"]+)\\"')
+
+# Namespace URI with a stray trailing backslash, fixed wherever it appears
+_DRAWING_2014_BAD = b'http://schemas.microsoft.com/office/drawing/2014/main\\'
+
+def _rgb_to_css(rgb):
+    """Format an (r, g, b) triple as a CSS hex color"""
+    return '#' + HEX[rgb[0]] + HEX[rgb[1]] + HEX[rgb[2]]
 
 def handle_picture(shape):
     """Handle picture shapes"""
     try:
-        image_data = None
+        src = None
         if hasattr(shape, 'image') and shape.image:
-            image_blob = shape.image.blob
-            image_type = shape.image.content_type.split('/')[-1]  # e.g., 'jpeg', 'png'
-            image_data = base64.b64encode(image_blob).decode()
+            image = shape.image
+            image_type = image.content_type.split('/')[-1]  # e.g., 'jpeg', 'png'
+            image_data = b64encode(image.blob)
+            if image_data:
+                # Build the data URI as bytes and decode it once
+                src = (b'data:image/' + image_type.encode('ascii') + b';base64,' + image_data).decode('ascii')
         
         opacity = 1
         if hasattr(shape, 'fill') and shape.fill:
@@ -31,49 +88,55 @@ def handle_picture(shape):
         
         return {
             "type": "image",
-            "src": f"data:image/{image_type};base64,{image_data}" if image_data else None,
+            "src": src,
             "opacity": opacity
         }
     except Exception as e:
         print(f"Error processing image: {e}")
         return None
 
-def get_color_value(color):
+def get_color_value(color, cache=None):
+    """Extract color value from a shape color
+    
+    With a cache dict, results are memoized on the color element's tag and
+    val, which is all the lookup depends on. The cache must not outlive
+    the presentation, as scheme colors resolve through its theme.
+    """
+    if cache is None:
+        return _get_color_value(color)
+    try:
+        xClr = color._color._xClr
+        key = None if xClr is None else (xClr.tag, xClr.get('val'))
+    except AttributeError:
+        # Not a python-pptx color format, nothing to key it on
+        return _get_color_value(color)
+    try:
+        return cache[key]
+    except KeyError:
+        value = cache[key] = _get_color_value(color)
+        return value
+
+def _get_color_value(color):
     """Extract color value safely from a shape color"""
     try:
-        if hasattr(color, 'rgb') and color.rgb:
+        # Only RGB colors have .rgb, others raise AttributeError
+        rgb = getattr(color, 'rgb', None)
+        if rgb:
             # Direct RGB color
-            return f'#{color.rgb[0]:02x}{color.rgb[1]:02x}{color.rgb[2]:02x}'
-        elif hasattr(color, 'theme_color'):
+            return _rgb_to_css(rgb)
+        elif getattr(color, 'theme_color', None) is not None:
             # Get color from theme if available
-            if hasattr(color._theme, 'theme_elements') and color._theme.theme_elements:
-                theme = color._theme.theme_elements
+            theme = getattr(color._theme, 'theme_elements', None)
+            if theme:
                 if theme.clrScheme:
                     scheme = theme.clrScheme
-                    if str(color.theme_color) == 'ACCENT_1':
-                        return get_scheme_color(scheme.accent1)
-                    elif str(color.theme_color) == 'ACCENT_2':
-                        return get_scheme_color(scheme.accent2)
-                    elif str(color.theme_color) == 'ACCENT_3':
-                        return get_scheme_color(scheme.accent3)
-                    elif str(color.theme_color) == 'ACCENT_4':
-                        return get_scheme_color(scheme.accent4)
-                    elif str(color.theme_color) == 'ACCENT_5':
-                        return get_scheme_color(scheme.accent5)
-                    elif str(color.theme_color) == 'ACCENT_6':
-                        return get_scheme_color(scheme.accent6)
-                    elif str(color.theme_color) == 'BACKGROUND_1':
-                        return get_scheme_color(scheme.bg1)
-                    elif str(color.theme_color) == 'BACKGROUND_2':
-                        return get_scheme_color(scheme.bg2)
-                    elif str(color.theme_color) == 'TEXT_1':
-                        return get_scheme_color(scheme.tx1)
-                    elif str(color.theme_color) == 'TEXT_2':
-                        return get_scheme_color(scheme.tx2)
+                    attr = _THEME_SCHEME_ATTRS.get(color.theme_color)
+                    if attr:
+                        return get_scheme_color(getattr(scheme, attr))
             
             # If theme color not found, try to get RGB
-            if hasattr(color, 'rgb') and color.rgb:
-                return f'#{color.rgb[0]:02x}{color.rgb[1]:02x}{color.rgb[2]:02x}'
+            if rgb:
+                return _rgb_to_css(rgb)
     except Exception as e:
         print(f"Error getting color value: {e}")
     return None  # Return None instead of default color
@@ -81,41 +144,41 @@ def get_color_value(color):
 def get_scheme_color(scheme_color):
     """Extract color from scheme color element"""
     try:
-        if hasattr(scheme_color, 'srgbClr'):
+        srgbClr = getattr(scheme_color, 'srgbClr', None)
+        if srgbClr is not None:
             # Direct sRGB color
-            return f'#{scheme_color.srgbClr.val}'
-        elif hasattr(scheme_color, 'sysClr'):
+            return f'#{srgbClr.val}'
+        sysClr = getattr(scheme_color, 'sysClr', None)
+        if sysClr is not None:
             # System color
-            return f'#{scheme_color.sysClr.lastClr}'
+            return f'#{sysClr.lastClr}'
     except Exception as e:
         print(f"Error getting scheme color: {e}")
     return None
 
-def get_shape_fill_info(shape):
+def get_shape_fill_info(shape, color_cache=None):
     """Get comprehensive fill information for shapes"""
-    if not hasattr(shape, 'fill'):
-        return None
-
     try:
-        fill = shape.fill
-        if fill is None or fill.type is None:
+        # Pictures, groups and connectors have no fill
+        fill = getattr(shape, 'fill', None)
+        if fill is None:
+            return None
+        fill_type = fill.type
+        if fill_type is None:
             return None
             
-        if fill.type == MSO_FILL.SOLID:
-            if hasattr(fill, 'fore_color') and fill.fore_color:
-                color = get_color_value(fill.fore_color)
-                if color:
-                    return {
-                        'type': 'solid',
-                        'value': color
-                    }
-        elif fill.type == MSO_FILL.GRADIENT:
+        if fill_type == MSO_FILL.SOLID:
+            color = get_color_value(fill.fore_color, color_cache)
+            if color:
+                return {
+                    'type': 'solid',
+                    'value': color
+                }
+        elif fill_type == MSO_FILL.GRADIENT:
             # Extract gradient information from XML
-            if hasattr(shape, 'element'):
-                grad_fill = shape.element.find('.//a:gradFill', 
-                    {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
-                if grad_fill is not None:
-                    return extract_gradient_info(grad_fill)
+            grad_fill = first(_XP_GRADFILL(shape.element))
+            if grad_fill is not None:
+                return extract_gradient_info(grad_fill)
     except Exception as e:
         print(f"Error getting fill info: {e}")
     
@@ -127,24 +190,21 @@ def extract_gradient_info(grad_fill):
         gradient_info = {'type': 'gradient', 'value': {'type': 'linear', 'colorStops': {}}}
         
         # Get gradient type
-        path = grad_fill.find('.//a:path', 
-            {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
+        path = first(_XP_FIRST_PATH(grad_fill))
         if path is not None:
             path_type = path.get('path', 'linear')
             gradient_info['value']['type'] = path_type
         
         # Get gradient stops
-        gs_list = grad_fill.findall('.//a:gs', 
-            {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
+        gs_list = _XP_GS(grad_fill)
         
         for gs in gs_list:
             pos = float(gs.get('pos', '0')) / 100000
             
             # Get color from different possible sources
             color = None
-            for color_type in ['srgbClr', 'schemeClr', 'sysClr']:
-                color_elem = gs.find(f'.//a:{color_type}', 
-                    {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
+            for color_type, xp_color in _XP_GS_COLORS.items():
+                color_elem = first(xp_color(gs))
                 if color_elem is not None:
                     if color_type == 'srgbClr':
                         color = f'#{color_elem.get("val")}'
@@ -167,22 +227,22 @@ def extract_gradient_info(grad_fill):
         print(f"Error extracting gradient info: {e}")
         return None
 
-def get_line_properties(shape):
+def get_line_properties(shape, color_cache=None):
     """Get line properties of a shape"""
     try:
-        if hasattr(shape, 'line'):
-            line = shape.line
-            props = {}
-            
-            if line.color:
-                color = get_color_value(line.color)
-                if color:
-                    props['stroke'] = color
+        # Groups and graphic frames have no line
+        line = getattr(shape, 'line', None)
+        if line is None:
+            return {}
+        props = {}
+        
+        color = get_color_value(line.color, color_cache)
+        if color:
+            props['stroke'] = color
+        
+        props['strokeWidth'] = line.width / EMU_PER_POINT  # Convert to points
             
-            if hasattr(line, 'width'):
-                props['strokeWidth'] = line.width / 12700  # Convert to points
-                
-            return props
+        return props
     except Exception as e:
         print(f"Error getting line properties: {e}")
     
@@ -193,11 +253,12 @@ def get_text_properties(shape):
         'paragraphs': []
     }
     
-    if not hasattr(shape, 'text_frame'):
+    text_frame = getattr(shape, 'text_frame', None)
+    if text_frame is None:
         return text_props
     
     # Process each paragraph in the shape
-    for paragraph in shape.text_frame.paragraphs:
+    for paragraph in text_frame.paragraphs:
         para_props = {
             'text': paragraph.text or '',
             'align': 'left'  # Default alignment
@@ -206,17 +267,18 @@ def get_text_properties(shape):
         # Font properties from the first run (assuming consistent formatting)
         if paragraph.runs:
             font = paragraph.runs[0].font
-            if hasattr(font, 'size') and font.size:
-                para_props['fontSize'] = font.size.pt
-            if hasattr(font, 'name') and font.name:
-                para_props['fontFamily'] = font.name
-            if hasattr(font, 'bold'):
-                para_props['fontWeight'] = 'bold' if font.bold else 'normal'
-            if hasattr(font, 'italic'):
-                para_props['fontStyle'] = 'italic' if font.italic else 'normal'
-            if hasattr(font, 'color') and font.color and hasattr(font.color, 'rgb'):
-                rgb = font.color.rgb
-                para_props['fill'] = f'#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}'
+            size = font.size
+            if size:
+                para_props['fontSize'] = size.pt
+            name = font.name
+            if name:
+                para_props['fontFamily'] = name
+            para_props['fontWeight'] = 'bold' if font.bold else 'normal'
+            para_props['fontStyle'] = 'italic' if font.italic else 'normal'
+            # Only RGB colors have .rgb, others raise AttributeError
+            rgb = getattr(font.color, 'rgb', None)
+            if rgb is not None:
+                para_props['fill'] = _rgb_to_css(rgb)
         
         text_props['paragraphs'].append(para_props)
     
@@ -244,113 +306,101 @@ def get_shape_path(shape):
             path_list = []
             
             # Find all path elements
-            for sp in spTree.iter('{http://schemas.openxmlformats.org/drawingml/2006/main}sp'):
-                for spPr in sp.iter('{http://schemas.openxmlformats.org/drawingml/2006/main}spPr'):
-                    for custGeom in spPr.iter('{http://schemas.openxmlformats.org/drawingml/2006/main}custGeom'):
-                        for pathLst in custGeom.iter('{http://schemas.openxmlformats.org/drawingml/2006/main}pathLst'):
-                            for path in pathLst.iter('{http://schemas.openxmlformats.org/drawingml/2006/main}path'):
-                                current_path = []
-                                
-                                # Process move commands
-                                for moveTo in path.iter('{http://schemas.openxmlformats.org/drawingml/2006/main}moveTo'):
-                                    for pt in moveTo.iter('{http://schemas.openxmlformats.org/drawingml/2006/main}pt'):
-                                        x = float(pt.get('x'))
-                                        y = float(pt.get('y'))
-                                        current_path.append(f'M {x} {y}')
-                                
-                                # Process line commands
-                                for lineTo in path.iter('{http://schemas.openxmlformats.org/drawingml/2006/main}lnTo'):
-                                    for pt in lineTo.iter('{http://schemas.openxmlformats.org/drawingml/2006/main}pt'):
-                                        x = float(pt.get('x'))
-                                        y = float(pt.get('y'))
-                                        current_path.append(f'L {x} {y}')
-                                
-                                # Process cubic bezier curves
-                                for cubicBezTo in path.iter('{http://schemas.openxmlformats.org/drawingml/2006/main}cubicBezTo'):
-                                    points = []
-                                    for pt in cubicBezTo.iter('{http://schemas.openxmlformats.org/drawingml/2006/main}pt'):
-                                        x = float(pt.get('x'))
-                                        y = float(pt.get('y'))
-                                        points.append((x, y))
-                                    if len(points) == 3:
-                                        current_path.append(f'C {points[0][0]} {points[0][1]} {points[1][0]} {points[1][1]} {points[2][0]} {points[2][1]}')
-                                
-                                # Process arc commands
-                                for arcTo in path.iter('{http://schemas.openxmlformats.org/drawingml/2006/main}arcTo'):
-                                    # Convert arc parameters to bezier curves
-                                    # This is a simplified version - you might need more complex arc handling
-                                    rx = float(arcTo.get('rx', 0))
-                                    ry = float(arcTo.get('ry', 0))
-                                    angle = float(arcTo.get('angle', 0))
-                                    current_path.append(f'A {rx} {ry} {angle} 0 1')
-                                
-                                # Close path if needed
-                                if path.get('w') == '1':
-                                    current_path.append('Z')
-                                
-                                path_list.append(' '.join(current_path))
-                                
+            for path in _XP_CUSTOM_PATHS(spTree):
+                # Walk the path's commands once, keeping them grouped by kind
+                commands = {_TAG_MOVETO: [], _TAG_LNTO: [], _TAG_CUBICBEZTO: [], _TAG_ARCTO: []}
+                for command in path.iter(_TAG_MOVETO, _TAG_LNTO, _TAG_CUBICBEZTO, _TAG_ARCTO):
+                    tag = command.tag
+                    if tag == _TAG_CUBICBEZTO:
+                        # Process cubic bezier curves
+                        points = [(float(pt.get('x')), float(pt.get('y'))) for pt in command.iter(_TAG_PT)]
+                        if len(points) == 3:
+                            commands[tag].append(f'C {points[0][0]} {points[0][1]} {points[1][0]} {points[1][1]} {points[2][0]} {points[2][1]}')
+                    elif tag == _TAG_ARCTO:
+                        # Convert arc parameters to bezier curves
+                        # This is a simplified version - you might need more complex arc handling
+                        rx = float(command.get('rx', 0))
+                        ry = float(command.get('ry', 0))
+                        angle = float(command.get('angle', 0))
+                        commands[tag].append(f'A {rx} {ry} {angle} 0 1')
+                    else:
+                        # Process move and line commands
+                        letter = 'M' if tag == _TAG_MOVETO else 'L'
+                        for pt in command.iter(_TAG_PT):
+                            x = float(pt.get('x'))
+                            y = float(pt.get('y'))
+                            commands[tag].append(f'{letter} {x} {y}')
+                
+                # Moves, then lines, then curves, then arcs
+                current_path = [cmd for group in commands.values() for cmd in group]
+                
+                # Close path if needed
+                if path.get('w') == '1':
+                    current_path.append('Z')
+                
+                path_list.append(' '.join(current_path))
+                
             return path_list if path_list else None
 
     except Exception as e:
         print(f"Error extracting shape path: {e}")
         return None
 
+def _freeform_point(pt):
+    """Format a DrawingML point as an SVG "x,y" pair in points"""
+    x = float(pt.get('x')) / EMU_PER_POINT
+    y = float(pt.get('y')) / EMU_PER_POINT
+    return f'{x},{y}'
+
+# Freeform path command handlers. paths is a list of SVG token lists, the
+# last of which is the path being built; moveTo starts a new path unless the
+# current one is still empty, and close ends it.
+def _freeform_move(cmd, paths):
+    if paths[-1]:
+        paths.append([])
+    paths[-1] += ('M', _freeform_point(cmd.find(_FIND_PT)))
+
+def _freeform_line(cmd, paths):
+    paths[-1] += ('L', _freeform_point(cmd.find(_FIND_PT)))
+
+def _freeform_cubic(cmd, paths):
+    pts = cmd.findall(_FIND_PT)
+    if len(pts) == 3:
+        paths[-1] += ('C', *map(_freeform_point, pts))
+
+def _freeform_close(cmd, paths):
+    paths[-1].append('Z')
+    paths.append([])
+
+# Freeform path command tag -> handler, keyed on the full Clark tag
+_FREEFORM_COMMANDS = {
+    _TAG_MOVETO: _freeform_move,
+    _TAG_LNTO: _freeform_line,
+    _TAG_CUBICBEZTO: _freeform_cubic,
+    _TAG_CLOSE: _freeform_close
+}
+
 def get_freeform_path(shape):
     """Extract path data from a freeform shape"""
     try:
-        path_elem = shape.element.find('.//a:path', 
-            {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
+        path_elem = first(_XP_FIRST_PATH(shape.element))
         if path_elem is None:
             return None
 
-        path_commands = []
-        current_path = []
+        # Each path is a list of SVG tokens: command letters and "x,y" points
+        path_commands = [[]]
+        get_handler = _FREEFORM_COMMANDS.get
         
         for child in path_elem:
-            tag = child.tag.split('}')[-1]
-            if tag == 'moveTo':
-                if current_path:
-                    path_commands.append(current_path)
-                current_path = ['M']
-                pt = child.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}pt')
-                x = float(pt.get('x')) / 12700
-                y = float(pt.get('y')) / 12700
-                current_path.extend([x, y])
-            elif tag == 'lnTo':
-                pt = child.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}pt')
-                x = float(pt.get('x')) / 12700
-                y = float(pt.get('y')) / 12700
-                current_path.extend(['L', x, y])
-            elif tag == 'cubicBezTo':
-                pts = child.findall('.//{http://schemas.openxmlformats.org/drawingml/2006/main}pt')
-                if len(pts) == 3:
-                    current_path.append('C')
-                    for pt in pts:
-                        x = float(pt.get('x')) / 12700
-                        y = float(pt.get('y')) / 12700
-                        current_path.extend([x, y])
-            elif tag == 'close':
-                current_path.append('Z')
-                path_commands.append(current_path)
-                current_path = []
-
-        if current_path:
-            path_commands.append(current_path)
+            handler = get_handler(child.tag)
+            if handler:
+                handler(child, path_commands)
+
+        if not path_commands[-1]:
+            path_commands.pop()
 
         # Convert path commands to SVG path string
-        svg_paths = []
-        for commands in path_commands:
-            path = ''
-            i = 0
-            while i < len(commands):
-                if isinstance(commands[i], str):
-                    path += commands[i] + ' '
-                    i += 1
-                else:
-                    path += f"{commands[i]},{commands[i+1]} "
-                    i += 2
-            svg_paths.append(path.strip())
+        svg_paths = [' '.join(commands) for commands in path_commands]
 
         return svg_paths
 
@@ -358,48 +408,55 @@ def get_freeform_path(shape):
         print(f"Error getting path data: {e}")
         return None
 
-def process_group_shape(group_shape):
+def process_group_shape(group_shape, color_cache=None):
     """Process all shapes within a group"""
+    if color_cache is None:
+        color_cache = {}
     shapes_data = []
     
     for shape in group_shape.shapes:
-        shape_data = process_shape(shape)
+        shape_data = process_shape(shape, color_cache)
         if shape_data:
             shapes_data.append(shape_data)
     
     return shapes_data
 
-def process_shape(shape):
-    """Process individual shape with all its properties"""
+def process_shape(shape, color_cache=None):
+    """Process individual shape with all its properties
+    
+    color_cache memoizes color lookups; pass one dict per presentation to
+    share it across shapes, or leave it out to use one for this shape tree.
+    """
+    if color_cache is None:
+        color_cache = {}
     try:
         base_data = {
-            "left": shape.left / 12700,
-            "top": shape.top / 12700,
-            "width": shape.width / 12700,
-            "height": shape.height / 12700,
-            "angle": shape.rotation if hasattr(shape, 'rotation') else 0
+            "left": shape.left / EMU_PER_POINT,
+            "top": shape.top / EMU_PER_POINT,
+            "width": shape.width / EMU_PER_POINT,
+            "height": shape.height / EMU_PER_POINT,
+            "angle": shape.rotation
         }
 
         # Get shape fill and line properties
-        fill_info = get_shape_fill_info(shape)
-        line_props = get_line_properties(shape)
+        fill_info = get_shape_fill_info(shape, color_cache)
+        line_props = get_line_properties(shape, color_cache)
 
         if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
             group_shapes = []
             for child in shape.shapes:
-                child_data = process_shape(child)
+                child_data = process_shape(child, color_cache)
                 if child_data:
                     group_shapes.append(child_data)
-            return {
-                **base_data,
-                "type": "group",
-                "objects": group_shapes
-            }
+            base_data["type"] = "group"
+            base_data["objects"] = group_shapes
+            return base_data
         
         elif shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
             pic_data = handle_picture(shape)
             if pic_data:
-                return {**base_data, **pic_data}
+                base_data.update(pic_data)
+                return base_data
             return None
 
         elif shape.shape_type == MSO_SHAPE_TYPE.TEXT_BOX:
@@ -412,20 +469,22 @@ def process_shape(shape):
             }
             
             # Get text properties
-            if hasattr(shape, 'text_frame') and shape.text_frame.paragraphs:
-                para = shape.text_frame.paragraphs[0]
-                if para.runs:
-                    run = para.runs[0]
-                    if hasattr(run.font, 'size') and run.font.size:
-                        text_data["fontSize"] = run.font.size.pt
-                    if hasattr(run.font, 'name') and run.font.name:
-                        text_data["fontFamily"] = run.font.name
-                    if hasattr(run.font, 'color') and run.font.color:
-                        color = get_color_value(run.font.color)
-                        if color:
-                            text_data["fill"] = color
-                    if hasattr(para, 'alignment'):
-                        text_data["textAlign"] = str(para.alignment).lower()
+            paragraphs = shape.text_frame.paragraphs
+            if paragraphs:
+                para = paragraphs[0]
+                runs = para.runs
+                if runs:
+                    font = runs[0].font
+                    size = font.size
+                    if size:
+                        text_data["fontSize"] = size.pt
+                    name = font.name
+                    if name:
+                        text_data["fontFamily"] = name
+                    color = get_color_value(font.color, color_cache)
+                    if color:
+                        text_data["fill"] = color
+                    text_data["textAlign"] = str(para.alignment).lower()
             
             # Add fill and line properties
             if fill_info:
@@ -433,14 +492,13 @@ def process_shape(shape):
             
             text_data.update(line_props)
             
-            return {**base_data, **text_data}
+            base_data.update(text_data)
+            return base_data
 
         elif shape.shape_type == MSO_SHAPE_TYPE.AUTO_SHAPE:
-            shape_data = {
-                **base_data,
-                "type": "shape",
-                **line_props
-            }
+            shape_data = base_data
+            shape_data["type"] = "shape"
+            shape_data.update(line_props)
             
             if fill_info:
                 if fill_info['type'] == 'solid':
@@ -453,12 +511,10 @@ def process_shape(shape):
         elif shape.shape_type == MSO_SHAPE_TYPE.FREEFORM:
             path_data = get_freeform_path(shape)
             if path_data:
-                shape_data = {
-                    **base_data,
-                    "type": "path",
-                    "path": path_data,
-                    **line_props
-                }
+                shape_data = base_data
+                shape_data["type"] = "path"
+                shape_data["path"] = path_data
+                shape_data.update(line_props)
                 
                 if fill_info:
                     if fill_info['type'] == 'solid':
@@ -476,53 +532,57 @@ def process_shape(shape):
 
 def fix_invalid_namespace_uri(xml_content):
     """Fix invalid namespace URIs in XML content"""
-    xml_content = re.sub(r'xmlns:[^=]+="[^"]+\\"', lambda m: m.group(0)[:-1] + '"', xml_content)
+    xml_content = _NS_URI_RE.sub(r'\1"', xml_content)
     xml_content = xml_content.replace('http://schemas.microsoft.com/office/drawing/2014/main\\', 
                                     'http://schemas.microsoft.com/office/drawing/2014/main')
     return xml_content
 
+def _needs_fix(xml_data):
+    """Check raw XML bytes for anything fix_invalid_namespace_uri would change"""
+    return b'\\"' in xml_data or _DRAWING_2014_BAD in xml_data
+
+def _has_invalid_xml(pptx_file):
+    """Check whether any XML member of a PPTX file needs fixing"""
+    with zipfile.ZipFile(pptx_file, 'r') as zip_ref:
+        for zinfo in zip_ref.infolist():
+            if zinfo.filename.endswith('.xml') and _needs_fix(zip_ref.read(zinfo)):
+                return True
+    return False
+
 def preprocess_pptx_file(pptx_file):
     """Preprocess PPTX file to fix any XML issues"""
-    temp_dir = tempfile.mkdtemp()
     try:
-        # Extract the PPTX file
-        with zipfile.ZipFile(pptx_file, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
-        
-        # Process XML files
-        for root, _, files in os.walk(temp_dir):
-            for file in files:
-                if file.endswith('.xml'):
-                    file_path = os.path.join(root, file)
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    # Fix invalid namespace URIs
-                    fixed_content = fix_invalid_namespace_uri(content)
-                    
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(fixed_content)
-        
-        # Create a new PPTX file
-        new_pptx_path = os.path.join(temp_dir, 'fixed.pptx')
-        with zipfile.ZipFile(new_pptx_path, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
-            for root, _, files in os.walk(temp_dir):
-                for file in files:
-                    if file != 'fixed.pptx':
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, temp_dir)
-                        zip_ref.write(file_path, arcname)
-        
-        # Create a copy in a persistent location
-        persistent_path = os.path.join(tempfile.gettempdir(), f'fixed_{uuid.uuid4()}.pptx')
-        shutil.copy2(new_pptx_path, persistent_path)
+        # Well-formed files, the common case, are used as they are
+        if not _has_invalid_xml(pptx_file):
+            return pptx_file
+    except Exception as e:
+        print(f"Error preprocessing PPTX file: {e}")
+        return pptx_file
+    
+    persistent_path = os.path.join(tempfile.gettempdir(), f'fixed_{uuid.uuid4()}.pptx')
+    try:
+        # Copy the PPTX member by member, fixing XML members on the way
+        with zipfile.ZipFile(pptx_file, 'r') as src_zip, \
+                zipfile.ZipFile(persistent_path, 'w', zipfile.ZIP_DEFLATED) as dst_zip:
+            for zinfo in src_zip.infolist():
+                data = src_zip.read(zinfo)
+                
+                if zinfo.filename.endswith('.xml') and _needs_fix(data):
+                    data = fix_invalid_namespace_uri(data.decode('utf-8')).encode('utf-8')
+                
+                # Keep each member's own compression, so stored media is
+                # not deflated
+                new_info = zipfile.ZipInfo(zinfo.filename, zinfo.date_time)
+                new_info.compress_type = zinfo.compress_type
+                new_info.external_attr = zinfo.external_attr
+                dst_zip.writestr(new_info, data)
         
         return persistent_path
     except Exception as e:
         print(f"Error preprocessing PPTX file: {e}")
+        if os.path.exists(persistent_path):
+            os.remove(persistent_path)
         return pptx_file
-    finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
 
 def pptx_to_fabric_json(pptx_file):
     """Convert PPTX file to Fabric.js JSON format"""
@@ -544,6 +604,10 @@ def pptx_to_fabric_json(pptx_file):
         text_handler = TextHandler(color_handler)
         shape_handler = ShapeHandler(color_handler, text_handler)
         
+        # Every slide shares the deck's size, converted to points once
+        slide_width = prs.slide_width / EMU_PER_POINT
+        slide_height = prs.slide_height / EMU_PER_POINT
+        
         slides_data = []
         for slide_index, slide in enumerate(prs.slides):
             slide_objects = []
@@ -556,8 +620,8 @@ def pptx_to_fabric_json(pptx_file):
                         "type": "rect",
                         "left": 0,
                         "top": 0,
-                        "width": prs.slide_width / 12700,
-                        "height": prs.slide_height / 12700,
+                        "width": slide_width,
+                        "height": slide_height,
                         "fill": bg_color,
                         "selectable": False
                     })
@@ -573,8 +637,8 @@ def pptx_to_fabric_json(pptx_file):
 
             slides_data.append({
                 "objects": slide_objects,
-                "width": prs.slide_width / 12700,
-                "height": prs.slide_height / 12700,
+                "width": slide_width,
+                "height": slide_height,
                 "slideNumber": slide_index + 1
             })
 
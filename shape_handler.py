@@ -1,54 +1,99 @@
 from pptx.enum.shapes import MSO_SHAPE_TYPE, MSO_SHAPE
 from pptx.enum.dml import MSO_FILL
 import math
+import logging
+from lxml import etree
 from advanced_shape_handler import AdvancedShapeHandler
+from ooxml_utils import EMU_PER_POINT, b64encode, first
+
+logger = logging.getLogger(__name__)
+
+_A = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+_NS = {'a': _A}
+
+# Clark-notation tags of the freeform path elements
+_TAG_PT = f'{{{_A}}}pt'
+_TAG_MOVETO = f'{{{_A}}}moveTo'
+_TAG_LNTO = f'{{{_A}}}lnTo'
+_TAG_CUBICBEZTO = f'{{{_A}}}cubicBezTo'
+_TAG_CLOSE = f'{{{_A}}}close'
+
+# Path command tag -> SVG command letter
+_TAG_OPS = {
+    _TAG_MOVETO: 'M',
+    _TAG_LNTO: 'L',
+    _TAG_CUBICBEZTO: 'C',
+    _TAG_CLOSE: 'Z'
+}
+
+# Shape types whose XML never carries the spPr that AdvancedShapeHandler reads
+_NO_ADVANCED_PROPS = frozenset({MSO_SHAPE_TYPE.GROUP})
+
+# Preset auto shapes with their own Fabric.js type, anything else is a "rect"
+_AUTOSHAPE_TYPES = {
+    # Triangles are often used as markers
+    MSO_SHAPE.ISOSCELES_TRIANGLE: 'triangle'
+    # Add more shape type mappings as needed
+}
+
+# Compiled XPath queries, built once at import
+_XP_FIRST_PATH = etree.XPath('(.//a:path)[1]', namespaces=_NS)
+_XP_ALPHA_MOD_FIX = etree.XPath('(.//a:alphaModFix)[1]', namespaces=_NS)
 
 class ShapeHandler:
     def __init__(self, color_handler, text_handler):
         self.color_handler = color_handler
         self.text_handler = text_handler
         self.advanced_handler = AdvancedShapeHandler()
+        # Picture data URLs by image part, so an image repeated across
+        # shapes and slides is encoded once
+        self._image_srcs = {}
+        # Shape type -> processing method
+        self._dispatch = {
+            MSO_SHAPE_TYPE.GROUP: self._process_group,
+            MSO_SHAPE_TYPE.PICTURE: self._process_picture,
+            MSO_SHAPE_TYPE.TEXT_BOX: self._process_textbox,
+            MSO_SHAPE_TYPE.AUTO_SHAPE: self._process_autoshape,
+            MSO_SHAPE_TYPE.FREEFORM: self._process_freeform,
+            MSO_SHAPE_TYPE.LINE: self._process_line
+        }
     
     def process_shape(self, shape):
         """Process any type of shape and return its properties"""
         try:
-            print(f"\nProcessing shape: {shape.shape_type}")  # Debug log
+            # shape_type is worked out from the XML on every access
+            shape_type = shape.shape_type
+            logger.debug("Processing shape: %s", shape_type)
+            handler = self._dispatch.get(shape_type)
+            if handler is None:
+                # Skip the property extraction for shapes that are dropped
+                logger.debug("Unsupported shape type: %s", shape_type)
+                return None
+            
             base_props = self._get_base_properties(shape)
             
-            # Get advanced properties first
-            advanced_props = self.advanced_handler.extract_shape_properties(shape)
-            if advanced_props:
-                fabric_props = self.advanced_handler.convert_to_fabric(advanced_props)
-                base_props.update(fabric_props)
+            # Get advanced properties first. Groups have grpSpPr rather than
+            # spPr, so there is nothing to extract for them
+            if shape_type not in _NO_ADVANCED_PROPS:
+                advanced_props = self.advanced_handler.extract_shape_properties(shape)
+                if advanced_props:
+                    fabric_props = self.advanced_handler.convert_to_fabric(advanced_props)
+                    base_props.update(fabric_props)
             
-            if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
-                return self._process_group(shape, base_props)
-            elif shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
-                return self._process_picture(shape, base_props)
-            elif shape.shape_type == MSO_SHAPE_TYPE.TEXT_BOX:
-                return self._process_textbox(shape, base_props)
-            elif shape.shape_type == MSO_SHAPE_TYPE.AUTO_SHAPE:
-                return self._process_autoshape(shape, base_props)
-            elif shape.shape_type == MSO_SHAPE_TYPE.FREEFORM:
-                return self._process_freeform(shape, base_props)
-            elif shape.shape_type == MSO_SHAPE_TYPE.LINE:
-                return self._process_line(shape, base_props)
-            else:
-                print(f"Unsupported shape type: {shape.shape_type}")
-                return None
+            return handler(shape, base_props)
                 
         except Exception as e:
-            print(f"Error processing shape: {e}")
+            logger.error("Error processing shape: %s", e)
             return None
     
     def _get_base_properties(self, shape):
         """Get basic properties common to all shapes"""
         return {
-            "left": shape.left / 12700,  # Convert EMU to points
-            "top": shape.top / 12700,
-            "width": shape.width / 12700,
-            "height": shape.height / 12700,
-            "rotation": shape.rotation if hasattr(shape, 'rotation') else 0
+            "left": shape.left / EMU_PER_POINT,  # Convert EMU to points
+            "top": shape.top / EMU_PER_POINT,
+            "width": shape.width / EMU_PER_POINT,
+            "height": shape.height / EMU_PER_POINT,
+            "rotation": shape.rotation
         }
     
     def _process_group(self, group_shape, base_props):
@@ -60,45 +105,49 @@ class ShapeHandler:
                 shapes_data.append(shape_data)
         
         if shapes_data:
-            return {
-                **base_props,
-                "type": "group",
-                "objects": shapes_data
-            }
+            base_props["type"] = "group"
+            base_props["objects"] = shapes_data
+            return base_props
         return None
     
     def _process_picture(self, shape, base_props):
         """Process a picture shape"""
         try:
-            print(f"Processing picture shape: {shape}")  # Debug log
+            logger.debug("Processing picture shape: %s", shape)
             if hasattr(shape, 'image'):
-                import base64
-                image_data = base64.b64encode(shape.image.blob).decode()
-                image_type = shape.image.content_type.split('/')[-1]
+                src = self._get_image_src(shape)
                 
                 # Don't try to access fill property for pictures
                 opacity = 1
                 if hasattr(shape, 'element'):
                     # Try to get opacity from element properties if available
-                    alpha_mod = shape.element.find('.//a:alphaModFix', 
-                        {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
+                    alpha_mod = first(_XP_ALPHA_MOD_FIX(shape.element))
                     if alpha_mod is not None:
                         amt = alpha_mod.get('amt')
                         if amt:
                             opacity = int(amt) / 100000
                 
-                return {
-                    **base_props,
-                    "type": "image",
-                    "src": f"data:image/{image_type};base64,{image_data}",
-                    "opacity": opacity,
-                    "crossOrigin": "anonymous"  # Add this to handle CORS issues
-                }
+                base_props["type"] = "image"
+                base_props["src"] = src
+                base_props["opacity"] = opacity
+                base_props["crossOrigin"] = "anonymous"  # Add this to handle CORS issues
+                return base_props
         except Exception as e:
-            print(f"Error processing picture: {e}")
-            print(f"Picture properties: {dir(shape)}")  # Debug log
+            logger.error("Error processing picture: %s", e)
         return None
     
+    def _get_image_src(self, shape):
+        """Get the data URL of a picture's image, encoding each image part once"""
+        image_part = shape.part.related_part(shape._element.blip_rId)
+        src = self._image_srcs.get(image_part)
+        if src is None:
+            # The content type is sniffed with PIL, so only for new images
+            image = image_part.image
+            image_data = b64encode(image.blob).decode()
+            image_type = image.content_type.split('/')[-1]
+            src = self._image_srcs[image_part] = f"data:image/{image_type};base64,{image_data}"
+        return src
+    
     def _process_textbox(self, shape, base_props):
         """Process a textbox shape"""
         try:
@@ -107,13 +156,11 @@ class ShapeHandler:
             fabric_text = self.text_handler.convert_to_fabric_text(text_props)
             
             if fabric_text:
-                return {
-                    **base_props,
-                    **fabric_text,
-                    "backgroundColor": self.color_handler.get_shape_color(shape)
-                }
+                base_props.update(fabric_text)
+                base_props["backgroundColor"] = self.color_handler.get_shape_color(shape)
+                return base_props
         except Exception as e:
-            print(f"Error processing textbox: {e}")
+            logger.error("Error processing textbox: %s", e)
         return None
     
     def _process_autoshape(self, shape, base_props):
@@ -123,22 +170,19 @@ class ShapeHandler:
             
             # Handle special shapes
             if hasattr(shape, 'auto_shape_type'):
-                # Handle triangles (often used for markers)
-                if shape.auto_shape_type == MSO_SHAPE.ISOSCELES_TRIANGLE:
-                    shape_type = "triangle"
-                # Add more shape type mappings as needed
+                shape_type = _AUTOSHAPE_TYPES.get(shape.auto_shape_type, shape_type)
             
-            shape_data = {
-                **base_props,
-                "type": shape_type
-            }
+            shape_data = base_props
+            shape_data["type"] = shape_type
             
-            # Get fill color
-            fill_color = self.color_handler.get_shape_color(shape)
-            if fill_color:
-                shape_data["fill"] = fill_color
-            else:
-                print("No fill color found for shape")  # Debug log
+            # Get fill color, keeping a gradient object from the advanced
+            # properties over the flat color placeholder
+            if not isinstance(shape_data.get("fill"), dict):
+                fill_color = self.color_handler.get_shape_color(shape)
+                if fill_color:
+                    shape_data["fill"] = fill_color
+                else:
+                    logger.debug("No fill color found for shape")
             
             # Get line properties
             line_props = self._get_line_properties(shape)
@@ -156,7 +200,7 @@ class ShapeHandler:
             return shape_data
             
         except Exception as e:
-            print(f"Error processing auto shape: {e}")
+            logger.error("Error processing auto shape: %s", e)
             return None
     
     def _process_freeform(self, shape, base_props):
@@ -164,16 +208,15 @@ class ShapeHandler:
         try:
             path_data = self._get_path_data(shape)
             if path_data:
-                shape_data = {
-                    **base_props,
-                    "type": "path",
-                    "path": path_data
-                }
+                shape_data = base_props
+                shape_data["type"] = "path"
+                shape_data["path"] = path_data
                 
-                # Get fill color
-                fill_color = self.color_handler.get_shape_color(shape)
-                if fill_color:
-                    shape_data["fill"] = fill_color
+                # Get fill color, unless a gradient object is already set
+                if not isinstance(shape_data.get("fill"), dict):
+                    fill_color = self.color_handler.get_shape_color(shape)
+                    if fill_color:
+                        shape_data["fill"] = fill_color
                 
                 # Get line properties
                 line_props = self._get_line_properties(shape)
@@ -182,27 +225,26 @@ class ShapeHandler:
                 return shape_data
                 
         except Exception as e:
-            print(f"Error processing freeform shape: {e}")
+            logger.error("Error processing freeform shape: %s", e)
         return None
     
     def _process_line(self, shape, base_props):
         """Process a line shape"""
         try:
             # Calculate line endpoints
-            start_x = shape.left / 12700
-            start_y = shape.top / 12700
-            end_x = (shape.left + shape.width) / 12700
-            end_y = (shape.top + shape.height) / 12700
+            left, top = shape.left, shape.top
+            start_x = left / EMU_PER_POINT
+            start_y = top / EMU_PER_POINT
+            end_x = (left + shape.width) / EMU_PER_POINT
+            end_y = (top + shape.height) / EMU_PER_POINT
             
             # Create path data for the line
             path_data = f'M {start_x} {start_y} L {end_x} {end_y}'
             
-            shape_data = {
-                **base_props,
-                "type": "path",
-                "path": path_data,
-                "fill": "transparent"  # Lines don't have fill
-            }
+            shape_data = base_props
+            shape_data["type"] = "path"
+            shape_data["path"] = path_data
+            shape_data["fill"] = "transparent"  # Lines don't have fill
             
             # Get line properties
             line_props = self._get_line_properties(shape)
@@ -216,79 +258,78 @@ class ShapeHandler:
             return shape_data
             
         except Exception as e:
-            print(f"Error processing line shape: {e}")
+            logger.error("Error processing line shape: %s", e)
             return None
     
     def _get_line_properties(self, shape):
         """Get line properties of a shape"""
         props = {}
         try:
-            if hasattr(shape, 'line'):
-                line = shape.line
-                if hasattr(line, 'color') and line.color:
+            # Groups and graphic frames have no line
+            line = getattr(shape, 'line', None)
+            if line is not None:
+                if line.color:
                     color = self.color_handler.get_shape_color(line)
                     if color:
                         props['stroke'] = color
                 
-                if hasattr(line, 'width'):
-                    props['strokeWidth'] = line.width / 12700  # Convert EMU to points
+                props['strokeWidth'] = line.width / EMU_PER_POINT  # Convert EMU to points
         except Exception as e:
-            print(f"Error getting line properties: {e}")
+            logger.error("Error getting line properties: %s", e)
         return props
     
     def _get_path_data(self, shape):
         """Extract path data from a shape"""
         try:
             if hasattr(shape, 'element'):
-                path_elem = shape.element.find('.//a:path', 
-                    {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
+                path_elem = first(_XP_FIRST_PATH(shape.element))
                 if path_elem is not None:
                     return self._extract_path_commands(path_elem)
         except Exception as e:
-            print(f"Error getting path data: {e}")
+            logger.error("Error getting path data: %s", e)
         return None
     
     def _extract_path_commands(self, path_elem):
         """Extract path commands from XML element"""
         try:
-            commands = []
-            current_x = 0
-            current_y = 0
+            # Collect each command as (op, point_count) plus the raw
+            # coordinates of its points
+            ops = []
+            raw = []
             
             for child in path_elem:
-                tag = child.tag.split('}')[-1]
+                op = _TAG_OPS.get(child.tag)
                 
-                if tag == 'moveTo':
-                    pt = child.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}pt')
-                    x = float(pt.get('x')) / 12700
-                    y = float(pt.get('y')) / 12700
-                    commands.append(f'M {x} {y}')
-                    current_x, current_y = x, y
-                    
-                elif tag == 'lnTo':
-                    pt = child.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}pt')
-                    x = float(pt.get('x')) / 12700
-                    y = float(pt.get('y')) / 12700
-                    commands.append(f'L {x} {y}')
-                    current_x, current_y = x, y
+                if op == 'M' or op == 'L':
+                    pt = next(child.iter(_TAG_PT), None)
+                    ops.append((op, 1))
+                    raw += (pt.get('x'), pt.get('y'))
                     
-                elif tag == 'cubicBezTo':
-                    pts = child.findall('.//{http://schemas.openxmlformats.org/drawingml/2006/main}pt')
+                elif op == 'C':
+                    pts = list(child.iter(_TAG_PT))
                     if len(pts) == 3:
-                        x1 = float(pts[0].get('x')) / 12700
-                        y1 = float(pts[0].get('y')) / 12700
-                        x2 = float(pts[1].get('x')) / 12700
-                        y2 = float(pts[1].get('y')) / 12700
-                        x3 = float(pts[2].get('x')) / 12700
-                        y3 = float(pts[2].get('y')) / 12700
-                        commands.append(f'C {x1} {y1} {x2} {y2} {x3} {y3}')
-                        current_x, current_y = x3, y3
+                        ops.append(('C', 3))
+                        for pt in pts:
+                            raw += (pt.get('x'), pt.get('y'))
                     
-                elif tag == 'close':
-                    commands.append('Z')
+                elif op == 'Z':
+                    ops.append(('Z', 0))
+            
+            # Convert all coordinates of the path from EMU to points and
+            # format them in one pass
+            coords = [str(float(v) / EMU_PER_POINT) for v in raw]
+            
+            # Build one flat token list and join the path once
+            tokens = []
+            i = 0
+            for op, count in ops:
+                n = 2 * count
+                tokens.append(op)
+                tokens += coords[i:i + n]
+                i += n
             
-            return ' '.join(commands)
+            return ' '.join(tokens)
             
         except Exception as e:
-            print(f"Error extracting path commands: {e}")
+            logger.error("Error extracting path commands: %s", e)
             return None 
\ No newline at end of file
@@ -0,0 +1,48 @@
+import io
+import unittest
+import orjson
+from pptx import Presentation
+from pptx.util import Inches
+from pptx.enum.shapes import MSO_SHAPE
+from app import app
+
+
+def _sample_deck():
+    """Build a two-slide deck in memory"""
+    prs = Presentation()
+    for index in range(2):
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Inches(1), Inches(1), Inches(2), Inches(1))
+        slide.shapes.add_textbox(Inches(1), Inches(3), Inches(2), Inches(1)).text_frame.text = 'Slide %d' % index
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    return buffer.getvalue()
+
+
+class StreamPptxToFabricTest(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def _post(self, url, data):
+        return self.client.post(
+            url,
+            data={'file': (io.BytesIO(data), 'deck.pptx')},
+            content_type='multipart/form-data'
+        )
+
+    def test_broken_deck_returns_json_error(self):
+        response = self._post('/pptx-to-fabric/stream', b'not a zip archive')
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('error', orjson.loads(response.data))
+
+    def test_streams_same_slides_as_pptx_to_fabric(self):
+        deck = _sample_deck()
+        streamed = self._post('/pptx-to-fabric/stream', deck)
+        converted = self._post('/pptx-to-fabric', deck)
+        self.assertEqual(streamed.status_code, 200)
+        self.assertEqual(len(orjson.loads(streamed.data)['fabric']), 2)
+        self.assertEqual(orjson.loads(streamed.data), orjson.loads(converted.data))
+
+
+if __name__ == '__main__':
+    unittest.main()
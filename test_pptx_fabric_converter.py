@@ -0,0 +1,50 @@
+import io
+import unittest
+import zipfile
+from unittest import mock
+from werkzeug.datastructures import FileStorage
+from pptx_fabric_converter import PPTXFabricConverter
+
+
+class FixInvalidNamespaceUriTest(unittest.TestCase):
+    def setUp(self):
+        self.converter = PPTXFabricConverter()
+
+    def test_strips_trailing_backslash_from_namespace_uri(self):
+        xml = b'<a:sld xmlns:x="http://example.com/ns\\" x:a="1"/>'
+        fixed = self.converter._fix_invalid_namespace_uri(xml)
+        self.assertEqual(fixed, b'<a:sld xmlns:x="http://example.com/ns" x:a="1"/>')
+
+    def test_strips_known_namespace_backslash(self):
+        xml = b'<p:sld xmlns:a16="http://schemas.microsoft.com/office/drawing/2014/main\\"/>'
+        fixed = self.converter._fix_invalid_namespace_uri(xml)
+        self.assertNotIn(b'\\', fixed)
+        self.assertIn(b'xmlns:a16="http://schemas.microsoft.com/office/drawing/2014/main"', fixed)
+
+    def test_leaves_valid_xml_unchanged(self):
+        xml = b'<a:sld xmlns:x="http://example.com/ns" x:a="1"/>'
+        self.assertIs(self.converter._fix_invalid_namespace_uri(xml), xml)
+
+
+class PreprocessPptxFileTest(unittest.TestCase):
+    def setUp(self):
+        self.converter = PPTXFabricConverter()
+
+    def test_failed_rewrite_returns_rewound_upload(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zip_out:
+            zip_out.writestr('ppt/presentation.xml', '<p:presentation xmlns:x="http://example.com/ns\\"/>')
+        upload = FileStorage(io.BytesIO(buffer.getvalue()), 'deck.pptx')
+
+        with mock.patch.object(self.converter, '_write_fixed_zip', side_effect=OSError('disk full')) as write:
+            processed = self.converter._preprocess_pptx_file(upload)
+
+        write.assert_called_once()
+
+        self.assertEqual(processed.tell(), 0)
+        self.assertEqual(processed.read(), buffer.getvalue())
+        processed.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
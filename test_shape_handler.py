@@ -0,0 +1,47 @@
+import unittest
+from pptx import Presentation
+from pptx.util import Pt
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.dml.color import RGBColor
+from color_handler import ColorHandler
+from text_handler import TextHandler
+from shape_handler import ShapeHandler
+
+
+class ProcessShapeTest(unittest.TestCase):
+    def setUp(self):
+        self.prs = Presentation()
+        self.slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
+        color_handler = ColorHandler(self.prs)
+        self.handler = ShapeHandler(color_handler, TextHandler(color_handler))
+
+    def test_freeform_becomes_path_without_clip(self):
+        builder = self.slide.shapes.build_freeform(10, 20, scale=Pt(1))
+        builder.add_line_segments([(100, 20), (100, 80)], close=True)
+        shape = builder.convert_to_shape()
+
+        data = self.handler.process_shape(shape)
+
+        self.assertEqual(data['type'], 'path')
+        self.assertTrue(data['path'].startswith('M'))
+        self.assertEqual((data['left'], data['top']), (10, 20))
+        # a:rect is the text box of the geometry, not a clip region
+        self.assertNotIn('clipPath', data)
+
+    def test_gradient_fill_is_kept(self):
+        shape = self.slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Pt(0), Pt(0), Pt(100), Pt(50))
+        shape.fill.gradient()
+        shape.fill.gradient_angle = 30
+        stops = shape.fill.gradient_stops
+        stops[0].color.rgb = RGBColor(0xFF, 0x00, 0x00)
+        stops[1].color.rgb = RGBColor(0x00, 0x00, 0xFF)
+
+        data = self.handler.process_shape(shape)
+
+        self.assertIsInstance(data['fill'], dict)
+        self.assertEqual(data['fill']['type'], 'linear')
+        self.assertEqual(list(data['fill']['colorStops'].values()), ['#FF0000', '#0000FF'])
+
+
+if __name__ == '__main__':
+    unittest.main()
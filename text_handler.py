@@ -1,4 +1,15 @@
 from pptx.enum.text import PP_ALIGN
+from collections import Counter
+import logging
+
+logger = logging.getLogger(__name__)
+
+_ALIGN_MAP = {
+    PP_ALIGN.LEFT: 'left',
+    PP_ALIGN.CENTER: 'center',
+    PP_ALIGN.RIGHT: 'right',
+    PP_ALIGN.JUSTIFY: 'justify'
+}
 
 class TextHandler:
     def __init__(self, color_handler):
@@ -10,29 +21,33 @@ class TextHandler:
             'paragraphs': []
         }
         
-        if not hasattr(shape, 'text_frame'):
+        # Pictures, groups and connectors have no text frame
+        text_frame = getattr(shape, 'text_frame', None)
+        if text_frame is None:
             return text_props
             
         try:
-            for paragraph in shape.text_frame.paragraphs:
+            for paragraph in text_frame.paragraphs:
                 para_props = self._get_paragraph_properties(paragraph)
                 if para_props:
                     text_props['paragraphs'].append(para_props)
                     
         except Exception as e:
-            print(f"Error getting text properties: {e}")
+            logger.error("Error getting text properties: %s", e)
             
         return text_props
     
     def _get_paragraph_properties(self, paragraph):
         """Extract properties from a paragraph"""
         try:
+            space_before = paragraph.space_before
+            space_after = paragraph.space_after
             para_props = {
                 'text': paragraph.text,
                 'align': self._get_alignment(paragraph),
-                'spacing_before': paragraph.space_before.pt if hasattr(paragraph, 'space_before') and paragraph.space_before else 0,
-                'spacing_after': paragraph.space_after.pt if hasattr(paragraph, 'space_after') and paragraph.space_after else 0,
-                'line_spacing': paragraph.line_spacing if hasattr(paragraph, 'line_spacing') else 1.0,
+                'spacing_before': space_before.pt if space_before else 0,
+                'spacing_after': space_after.pt if space_after else 0,
+                'line_spacing': paragraph.line_spacing,
                 'runs': []
             }
             
@@ -45,52 +60,49 @@ class TextHandler:
             return para_props
             
         except Exception as e:
-            print(f"Error getting paragraph properties: {e}")
+            logger.error("Error getting paragraph properties: %s", e)
             return None
     
     def _get_run_properties(self, run):
         """Extract properties from a run"""
         try:
+            # run.font builds a new Font on every access
+            font = run.font
+            size = font.size
             props = {
                 'text': run.text,
                 'font': {
-                    'name': run.font.name if hasattr(run.font, 'name') else 'Arial',
-                    'size': run.font.size.pt if hasattr(run.font, 'size') and run.font.size else 12,
-                    'bold': run.font.bold if hasattr(run.font, 'bold') else False,
-                    'italic': run.font.italic if hasattr(run.font, 'italic') else False,
-                    'underline': run.font.underline if hasattr(run.font, 'underline') else False,
+                    'name': font.name,
+                    'size': size.pt if size else 12,
+                    'bold': font.bold,
+                    'italic': font.italic,
+                    'underline': font.underline,
                     'color': self.color_handler.get_text_color(run),
-                    'strike': run.font.strike if hasattr(run.font, 'strike') else False,
-                    'subscript': run.font.subscript if hasattr(run.font, 'subscript') else False,
-                    'superscript': run.font.superscript if hasattr(run.font, 'superscript') else False
+                    # Not exposed by every python-pptx version
+                    'strike': getattr(font, 'strike', False),
+                    'subscript': getattr(font, 'subscript', False),
+                    'superscript': getattr(font, 'superscript', False)
                 }
             }
             
             return props
             
         except Exception as e:
-            print(f"Error getting run properties: {e}")
+            logger.error("Error getting run properties: %s", e)
             return None
     
     def _get_alignment(self, paragraph):
         """Get paragraph alignment"""
         try:
-            if hasattr(paragraph, 'alignment'):
-                align_map = {
-                    PP_ALIGN.LEFT: 'left',
-                    PP_ALIGN.CENTER: 'center',
-                    PP_ALIGN.RIGHT: 'right',
-                    PP_ALIGN.JUSTIFY: 'justify'
-                }
-                return align_map.get(paragraph.alignment, 'left')
+            return _ALIGN_MAP.get(paragraph.alignment, 'left')
         except Exception as e:
-            print(f"Error getting alignment: {e}")
+            logger.error("Error getting alignment: %s", e)
         return 'left'  # Default alignment
     
     def convert_to_fabric_text(self, text_props):
         """Convert text properties to Fabric.js format"""
         try:
-            print(f"Converting text properties: {text_props}")  # Debug log
+            logger.debug("Converting text properties: %s", text_props)
             
             fabric_text = {
                 'type': 'textbox',
@@ -105,64 +117,75 @@ class TextHandler:
             }
             
             # Track the most common font properties to set as default
-            font_sizes = []
-            font_families = []
-            colors = []
-            alignments = []
+            font_sizes = Counter()
+            font_families = Counter()
+            colors = Counter()
+            alignments = Counter()
             
+            # Text pieces, joined once all paragraphs are processed
+            text_parts = []
+            style_cache = {}
             current_index = 0
             for paragraph in text_props['paragraphs']:
-                print(f"Processing paragraph: {paragraph}")  # Debug log
+                logger.debug("Processing paragraph: %s", paragraph)
                 
-                alignments.append(paragraph['align'])
+                alignments[paragraph['align']] += 1
                 
                 for run in paragraph['runs']:
                     text = run['text']
                     if text:
-                        fabric_text['text'] += text
+                        text_parts.append(text)
                         
-                        font_sizes.append(run['font']['size'])
-                        font_families.append(run['font']['name'])
-                        colors.append(run['font']['color'])
+                        font = run['font']
+                        font_sizes[font['size']] += 1
+                        font_families[font['name']] += 1
+                        colors[font['color']] += 1
                         
-                        # Add style information for this run
-                        style = {
-                            'fontFamily': run['font']['name'],
-                            'fontSize': run['font']['size'],
-                            'fontWeight': 'bold' if run['font']['bold'] else 'normal',
-                            'fontStyle': 'italic' if run['font']['italic'] else 'normal',
-                            'underline': run['font']['underline'],
-                            'fill': run['font']['color'],
-                            'textAlign': paragraph['align']
-                        }
+                        # Add style information for this run, sharing one
+                        # dict between all runs formatted the same way
+                        key = (font['name'], font['size'], bool(font['bold']), bool(font['italic']),
+                               font['underline'], font['color'], paragraph['align'])
+                        style = style_cache.get(key)
+                        if style is None:
+                            style = style_cache[key] = {
+                                'fontFamily': font['name'],
+                                'fontSize': font['size'],
+                                'fontWeight': 'bold' if font['bold'] else 'normal',
+                                'fontStyle': 'italic' if font['italic'] else 'normal',
+                                'underline': font['underline'],
+                                'fill': font['color'],
+                                'textAlign': paragraph['align']
+                            }
                         
-                        print(f"Adding style for text '{text}': {style}")  # Debug log
+                        logger.debug("Adding style for text '%s': %s", text, style)
                         
                         # Add style for each character in the run
-                        for i in range(len(text)):
-                            fabric_text['styles'][str(current_index + i)] = style
+                        fabric_text['styles'].update(dict.fromkeys(
+                            map(str, range(current_index, current_index + len(text))), style))
                         
                         current_index += len(text)
                 
                 # Add newline between paragraphs
                 if paragraph != text_props['paragraphs'][-1]:
-                    fabric_text['text'] += '\n'
+                    text_parts.append('\n')
                     current_index += 1
             
+            fabric_text['text'] = ''.join(text_parts)
+            
             # Set the most common properties as defaults
             if font_sizes:
-                fabric_text['fontSize'] = max(set(font_sizes), key=font_sizes.count)
+                fabric_text['fontSize'] = font_sizes.most_common(1)[0][0]
             if font_families:
-                fabric_text['fontFamily'] = max(set(font_families), key=font_families.count)
+                fabric_text['fontFamily'] = font_families.most_common(1)[0][0]
             if colors:
-                fabric_text['fill'] = max(set(colors), key=colors.count)
+                fabric_text['fill'] = colors.most_common(1)[0][0]
             if alignments:
-                fabric_text['textAlign'] = max(set(alignments), key=alignments.count)
+                fabric_text['textAlign'] = alignments.most_common(1)[0][0]
             
-            print(f"Final fabric text object: {fabric_text}")  # Debug log
+            logger.debug("Final fabric text object: %s", fabric_text)
             return fabric_text
             
         except Exception as e:
-            print(f"Error converting to Fabric text: {e}")
-            print(f"Text properties: {text_props}")  # Debug log
+            logger.error("Error converting to Fabric text: %s", e)
+            logger.debug("Text properties: %s", text_props)
             return None 
\ No newline at end of file